@@ -1,13 +1,32 @@
 """
 Module for handling Twitch API authentication using twitchAPI package
 """
-import os
+import time
 import asyncio
-from typing import Optional, Tuple
+import warnings
+from typing import Dict, Optional, Tuple
 
 from twitchAPI.twitch import Twitch
 from modules.utils.logger import print_header, print_error, print_success
 
+# Refresh tokens this many seconds before they actually expire
+TOKEN_EXPIRY_MARGIN = 60
+# How long a cached token is reused. Twitch app tokens live much longer, but twitchAPI
+# doesn't report their lifetime, so re-authenticate hourly to be safe
+TOKEN_TTL = 3600
+
+# (client_id, client_secret) -> (token, expiry as time.monotonic(), Twitch instance)
+_TOKEN_CACHE: Dict[Tuple[str, str], Tuple[str, float, Twitch]] = {}
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop shared by all get_token calls, creating it on first use"""
+    global _LOOP
+    if _LOOP is None or _LOOP.is_closed():
+        _LOOP = asyncio.new_event_loop()
+    return _LOOP
+
 class TwitchAuthenticator:
     def __init__(self, client_id: str, client_secret: str):
         """Initialize TwitchAuthenticator
@@ -42,8 +61,13 @@ class TwitchAuthenticator:
 def get_token(client_id: str, client_secret: str) -> Optional[str]:
     """Get a valid Twitch access token
     
+    Deprecated: await TwitchAuthenticator.authenticate() on the application's own
+    event loop instead, so the Twitch client is created and used on the same loop.
+    
     This is a synchronous wrapper around the async authenticate method
-    to maintain compatibility with existing code.
+    to maintain compatibility with existing code. Tokens are cached per
+    credential pair for TOKEN_TTL seconds, and all calls share
+    one event loop so the Twitch HTTP session survives between calls.
     
     Args:
         client_id: Twitch Client ID
@@ -52,13 +76,23 @@ def get_token(client_id: str, client_secret: str) -> Optional[str]:
     Returns:
         Access token string if successful, None if failed
     """
+    warnings.warn("get_token() runs its own event loop; await TwitchAuthenticator.authenticate() "
+                  "on the application's loop instead", DeprecationWarning, stacklevel=2)
+    key = (client_id, client_secret)
+    cached = _TOKEN_CACHE.get(key)
+    if cached and time.monotonic() < cached[1] - TOKEN_EXPIRY_MARGIN:
+        return cached[0]
+
     authenticator = TwitchAuthenticator(client_id, client_secret)
     
     try:
-        # Run async authenticate in an event loop
-        token, twitch = asyncio.run(authenticator.authenticate())
+        # Run async authenticate on the shared event loop
+        token, twitch = _get_loop().run_until_complete(authenticator.authenticate())
         if token and twitch:
-            # We got a valid token and Twitch instance
+            # We got a valid token and Twitch instance; close the one it replaces
+            if cached:
+                _get_loop().run_until_complete(cached[2].close())
+            _TOKEN_CACHE[key] = (token, time.monotonic() + TOKEN_TTL, twitch)
             return token
             
     except Exception as e:
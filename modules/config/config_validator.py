@@ -1,13 +1,118 @@
+import copy
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Any, Tuple
 import os
-from datetime import datetime, timedelta
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fastjsonschema
+    from fastjsonschema import JsonSchemaException
+except ImportError:
+    fastjsonschema = None
+
 from modules.utils.logger import print_error, print_header, print_success
 
 class ConfigValidationError(Exception):
     """Custom exception for configuration validation errors"""
     pass
 
+# Mirrors VALIDATIONS and the _validate_* methods below. Draft-04 is used so that
+# "integer" rejects floats (e.g. 5.0), matching the isinstance(value, int) checks.
+CONFIG_SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-04/schema#',
+    'type': 'object',
+    'required': ['default', 'blacklist'],
+    'properties': {
+        'default': {
+            'type': 'object',
+            'required': [
+                'CLIPS_AMOUNT',
+                'PERIOD',
+                'GAME_ID',
+                'BROADCASTER_ID',
+                'UPLOAD_TO_YOUTUBE',
+                'UPLOAD_TO_TIKTOK'
+            ],
+            'properties': {
+                'CLIPS_AMOUNT': {'type': 'integer', 'minimum': 1, 'maximum': 100},
+                'PERIOD': {'type': 'integer', 'minimum': 1, 'maximum': 365},
+                'GAME_ID': {'type': 'integer', 'minimum': 1},
+                'BROADCASTER_ID': {'type': 'integer', 'minimum': 1},
+                'UPLOAD_TO_YOUTUBE': {'type': 'boolean'},
+                'UPLOAD_TO_TIKTOK': {'type': 'boolean'}
+            }
+        },
+        'video': {
+            'type': 'object',
+            'properties': {
+                'VIDEO_WIDTH': {'type': 'integer', 'minimum': 480, 'maximum': 3840},
+                'VIDEO_HEIGHT': {'type': 'integer', 'minimum': 720, 'maximum': 2160},
+                'BACKGROUND_TYPE': {'enum': ['blurred', 'gradient', 'solid']}
+            }
+        },
+        'encoding': {
+            'type': 'object',
+            'properties': {
+                # CRF and FRAMERATE may be given as numbers or numeric strings
+                'CRF': {'anyOf': [
+                    {'type': 'integer', 'minimum': 0, 'maximum': 51},
+                    {'type': 'string', 'pattern': '^([0-9]|[1-4][0-9]|5[01])$'}
+                ]},
+                'FRAMERATE': {'anyOf': [
+                    {'type': 'integer', 'minimum': 15, 'maximum': 60},
+                    {'type': 'string', 'pattern': '^(1[5-9]|[2-5][0-9]|60)$'}
+                ]},
+                'MAX_DURATION_SECONDS': {'type': 'integer', 'minimum': 10, 'maximum': 600}
+            }
+        }
+    }
+}
+
+# Compiled once at import time into a single generated validation function
+_VALIDATE = fastjsonschema.compile(CONFIG_SCHEMA) if fastjsonschema is not None else None
+
+# Value checks for the default section: (key, kind, min_value, max_value)
+VALIDATIONS = (
+    ('CLIPS_AMOUNT', 'int', 1, 100),
+    ('PERIOD', 'int', 1, 365),
+    ('GAME_ID', 'int', 1, None),
+    ('BROADCASTER_ID', 'int', 1, None),
+    ('UPLOAD_TO_YOUTUBE', 'bool', None, None),
+    ('UPLOAD_TO_TIKTOK', 'bool', None, None),
+)
+
+def _build_default_checks(validations) -> Any:
+    """Generate a straight-line validator for the default section from a check table"""
+    lines = [
+        "def _run_default_checks(config, errors):",
+        "    d = config.get('default', {})",
+        "    if not isinstance(d, dict):",
+        "        d = {}",
+    ]
+    for key, kind, min_value, max_value in validations:
+        lines.append(f"    v = d.get({key!r})")
+        if kind == 'bool':
+            lines.append("    if not isinstance(v, bool):")
+            lines.append(f"        errors.append({f'{key} must be a boolean value (true/false)'!r})")
+            continue
+        lines.append("    if not isinstance(v, int):")
+        lines.append(f"        errors.append({f'{key} must be a valid number'!r})")
+        if min_value is not None or max_value is not None:
+            lines.append("    else:")
+            if min_value is not None:
+                lines.append(f"        if v < {min_value!r}:")
+                lines.append(f"            errors.append({f'{key} must be at least {min_value}'!r})")
+            if max_value is not None:
+                lines.append(f"        if v > {max_value!r}:")
+                lines.append(f"            errors.append({f'{key} must be at most {max_value}'!r})")
+    namespace: Dict[str, Any] = {}
+    exec(compile("\n".join(lines), '<config_validator default checks>', 'exec'), namespace)
+    return namespace['_run_default_checks']
+
 class ConfigValidator:
     REQUIRED_SECTIONS = ['default', 'blacklist']
     REQUIRED_DEFAULT_KEYS = [
@@ -19,11 +124,17 @@ class ConfigValidator:
         'UPLOAD_TO_TIKTOK'
     ]
 
+    # (path, st_mtime_ns, st_size) -> (config, errors, warnings) from the content checks.
+    # File-existence checks are left out since those files can change independently.
+    _CACHE: Dict[Tuple[str, int, int], Tuple[Dict[str, Any], List[str], List[str]]] = {}
+
     def __init__(self, config_path: str):
         self.config_path = config_path
         self.config: Dict[str, Any] = {}
         self.errors: List[str] = []
         self.warnings: List[str] = []
+        self._cfg_dir = os.path.dirname(os.path.abspath(config_path))
+        self._cfg_files = set()
 
     def validate(self) -> bool:
         """
@@ -33,83 +144,122 @@ class ConfigValidator:
             bool: True if configuration is valid, False otherwise
         """
         try:
-            if not os.path.exists(self.config_path):
+            try:
+                st = os.stat(self.config_path)
+            except FileNotFoundError:
                 raise ConfigValidationError(f"Configuration file not found: {self.config_path}")
 
+            # Reuse the previous content checks if the file hasn't changed since
+            cache_key = (self.config_path, st.st_mtime_ns, st.st_size)
+            cached = self._CACHE.get(cache_key)
+            if cached is not None:
+                config, errors, warnings = cached
+                self.config = copy.deepcopy(config)
+                self.errors = list(errors)
+                self.warnings = list(warnings)
+            else:
+                self._check_config()
+                self._CACHE[cache_key] = (copy.deepcopy(self.config), list(self.errors), list(self.warnings))
+
+            # Every later check reads these sections, so skip them if any is missing
+            if all(section in self.config for section in self.REQUIRED_SECTIONS):
+                self._check_files()
+
+            return self._report()
+
+        except Exception as e:
+            print_error(f"Error validating configuration: {e}")
+            return False
+
+    def _check_config(self):
+        """Load the configuration file and run every check that only depends on its contents"""
+        self.errors = []
+        self.warnings = []
+        if orjson is not None:
+            with open(self.config_path, 'rb') as f:
+                self.config = orjson.loads(f.read())
+        else:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
-            
-            # Check required sections
-            for section in self.REQUIRED_SECTIONS:
-                if section not in self.config:
-                    self.errors.append(f"Missing required section: {section}")
-
-            # Check required keys in default section
-            default_section = self.config.get('default', {})
-            for key in self.REQUIRED_DEFAULT_KEYS:
-                if key not in default_section:
-                    self.errors.append(f"Missing required key in default section: {key}")
-
-            # Validate specific values
-            self._validate_numeric('CLIPS_AMOUNT', min_value=1, max_value=100)
-            self._validate_numeric('PERIOD', min_value=1, max_value=365)
-            self._validate_numeric('GAME_ID', min_value=1)
-            self._validate_numeric('BROADCASTER_ID', min_value=1)
-            self._validate_boolean('UPLOAD_TO_YOUTUBE')
-            self._validate_boolean('UPLOAD_TO_TIKTOK')
-
-            # Validate dependent configurations
-            self._validate_upload_configs()
-            self._validate_watermark_config()
+        
+        # Check required sections
+        for section in self.REQUIRED_SECTIONS:
+            if section not in self.config:
+                self.errors.append(f"Missing required section: {section}")
+
+        # Every later check reads these sections, so stop before they cascade
+        if self.errors:
+            return
+
+        # Check required keys in default section
+        default_section = self.config.get('default', {})
+        for key in self.REQUIRED_DEFAULT_KEYS:
+            if key not in default_section:
+                self.errors.append(f"Missing required key in default section: {key}")
+
+        # The compiled schema covers every check that can only produce errors;
+        # the detailed checks only run when it fails, to collect the messages
+        schema_ok = self._matches_schema()
+
+        # Validate specific values
+        if not schema_ok:
+            self._run_default_checks(self.config, self.errors)
+
+        # Validate dependent configurations
+        self._validate_watermark_config()
+        if not schema_ok:
             self._validate_video_config()
             self._validate_encoding_config()
-            self._validate_paths_config()
 
-            if self.errors:
-                print_error("Configuration validation failed:")
-                for error in self.errors:
-                    print_error(f"- {error}")
-                return False
+    def _check_files(self):
+        """Check that the files the configuration refers to exist"""
+        # List the config directory once so existence checks don't each stat
+        try:
+            self._cfg_files = {entry.name for entry in os.scandir(self._cfg_dir)}
+        except OSError:
+            self._cfg_files = set()
 
-            if self.warnings:
-                print_header("Configuration warnings:")
-                for warning in self.warnings:
-                    print_header(f"- {warning}")
+        self._validate_upload_configs()
+        self._validate_paths_config()
 
-            print_success("Configuration validation successful")
-            return True
+    def _report(self) -> bool:
+        """Print errors/warnings
+        
+        Returns:
+            bool: True if configuration is valid, False otherwise
+        """
+        is_valid = not self.errors
 
-        except Exception as e:
-            print_error(f"Error validating configuration: {e}")
+        if not is_valid:
+            print_error("Configuration validation failed:")
+            for error in self.errors:
+                print_error(f"- {error}")
             return False
 
-    def _validate_numeric(self, key: str, min_value: Optional[int] = None, max_value: Optional[int] = None):
-        """Validate numeric configuration values"""
-        try:
-            default_section = self.config.get('default', {})
-            value = default_section.get(key)
-            
-            if not isinstance(value, int):
-                self.errors.append(f"{key} must be a valid number")
-                return
-                
-            if min_value is not None and value < min_value:
-                self.errors.append(f"{key} must be at least {min_value}")
-            if max_value is not None and value > max_value:
-                self.errors.append(f"{key} must be at most {max_value}")
-        except Exception:
-            self.errors.append(f"{key} must be a valid number")
-
-    def _validate_boolean(self, key: str):
-        """Validate boolean configuration values"""
+        if self.warnings:
+            print_header("Configuration warnings:")
+            for warning in self.warnings:
+                print_header(f"- {warning}")
+
+        print_success("Configuration validation successful")
+        return True
+
+    def _matches_schema(self) -> bool:
+        """Check the whole config against the compiled schema in one call"""
+        if _VALIDATE is None:
+            return False
         try:
-            default_section = self.config.get('default', {})
-            value = default_section.get(key)
-            
-            if not isinstance(value, bool):
-                self.errors.append(f"{key} must be a boolean value (true/false)")
-        except Exception:
-            self.errors.append(f"{key} must be a boolean value (true/false)")
+            _VALIDATE(self.config)
+            return True
+        except JsonSchemaException:
+            return False
+
+    def _file_exists(self, path: str) -> bool:
+        """Check if a file exists, using the cached config directory listing when possible"""
+        path = os.path.normpath(path)
+        if os.path.dirname(path) == self._cfg_dir:
+            return os.path.basename(path) in self._cfg_files
+        return os.path.exists(path)
 
     def _validate_upload_configs(self):
         """Validate upload-related configurations"""
@@ -118,14 +268,12 @@ class ConfigValidator:
         upload_to_tiktok = default_section.get('UPLOAD_TO_TIKTOK', False)
 
         if upload_to_youtube:
-            youtube_cookies = os.path.join(os.path.dirname(self.config_path), 'yt_cookies.txt')
-            if not os.path.exists(youtube_cookies):
+            if 'yt_cookies.txt' not in self._cfg_files:
                 self.warnings.append("YouTube uploads enabled but cookies file not found")
 
         if upload_to_tiktok:
-            tiktok_cookies = os.path.join(os.path.dirname(os.path.dirname(self.config_path)), 
-                                        'modules', 'config', 'cookies.txt')
-            if not os.path.exists(tiktok_cookies):
+            tiktok_cookies = os.path.join(os.path.dirname(self._cfg_dir), 'modules', 'config', 'cookies.txt')
+            if not self._file_exists(tiktok_cookies):
                 self.warnings.append("TikTok uploads enabled but cookies file not found")
 
     def _validate_watermark_config(self):
@@ -218,6 +366,9 @@ class ConfigValidator:
         # Check if essential files exist
         youtube_cookies = paths_section.get('YOUTUBE_COOKIES', 'config/yt_cookies.txt')
         if self.config.get('default', {}).get('UPLOAD_TO_YOUTUBE', False):
-            full_path = os.path.join(os.path.dirname(self.config_path), '..', youtube_cookies)
-            if not os.path.exists(full_path):
+            full_path = os.path.join(self._cfg_dir, '..', youtube_cookies)
+            if not self._file_exists(full_path):
                 self.warnings.append(f"YouTube cookies file not found: {youtube_cookies}")
+
+# Generated once at import time from VALIDATIONS
+ConfigValidator._run_default_checks = staticmethod(_build_default_checks(VALIDATIONS))
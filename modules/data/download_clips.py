@@ -2,55 +2,124 @@
 Module for downloading Twitch clips using Streamlink
 """
 import os
+import asyncio
 import subprocess
 import sys
 import shutil
-from typing import Dict, Any, Optional
-import pkg_resources
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 
 from modules.utils.logger import print_header, print_error, print_success
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
+
+@lru_cache(maxsize=1)
+def _streamlink_installed() -> bool:
+    """Check whether the streamlink package is installed (cached for the process)"""
+    # Imported lazily so merely importing this module doesn't load metadata machinery
+    from importlib.metadata import distribution, PackageNotFoundError
+    
+    try:
+        distribution('streamlink')
+        return True
+    except PackageNotFoundError:
+        return False
+
+@lru_cache(maxsize=1)
+def _streamlink_executable() -> Optional[str]:
+    """Get the path to the streamlink executable (cached for the process)"""
+    streamlink_exe = "streamlink.exe" if sys.platform == "win32" else "streamlink"
+    
+    # Try PATH first (a single lookup)
+    path_streamlink = shutil.which(streamlink_exe)
+    if path_streamlink:
+        return path_streamlink
+        
+    # Fall back to the Scripts directory (pip install location)
+    scripts_path = os.path.join(os.path.dirname(sys.executable), "Scripts")
+    local_path = os.path.join(scripts_path, streamlink_exe)
+    
+    if os.path.exists(local_path):
+        return local_path
+        
+    return None
+
+# Number of trailing streamlink stderr lines kept for error reporting
+STDERR_TAIL_LINES = 50
+# Read and file buffer size for direct clip downloads, so a clip is written in a few large writes
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
 class ClipDownloader:
-    def __init__(self, base_folder: str = 'clips'):
+    def __init__(self, base_folder: str = 'clips', hls_segment_threads: int = 3):
         """Initialize ClipDownloader
         
         Args:
             base_folder: Base folder to store downloaded clips
+            hls_segment_threads: Number of HLS segments streamlink fetches in parallel
         """
         self.base_folder = base_folder
+        self.hls_segment_threads = max(1, int(hls_segment_threads))
+        self._created_dirs = set()
+        # HTTP session for direct clip downloads, opened on first use and kept alive between clips
+        self._http = None
         self._ensure_streamlink_installed()
         
     def _ensure_streamlink_installed(self) -> None:
         """Ensure streamlink is installed and available"""
-        try:
-            # Check if streamlink is installed
-            pkg_resources.get_distribution('streamlink')
-        except pkg_resources.DistributionNotFound:
+        # Check if streamlink is installed
+        if not _streamlink_installed():
             print_header("Streamlink not found, installing...")
             subprocess.check_call([sys.executable, "-m", "pip", "install", "streamlink>=6.11.0"])
+            _streamlink_installed.cache_clear()
+            _streamlink_executable.cache_clear()
             print_success("Streamlink installed successfully")
             
         # Find streamlink executable
-        self.streamlink_path = self._get_streamlink_path()
+        self.streamlink_path = _streamlink_executable()
         if not self.streamlink_path:
+            # Don't cache a failed lookup
+            _streamlink_executable.cache_clear()
             raise RuntimeError("Could not find streamlink executable")
             
-    def _get_streamlink_path(self) -> Optional[str]:
-        """Get the path to the streamlink executable"""
-        # Try Scripts directory first (pip install location)
-        scripts_path = os.path.join(os.path.dirname(sys.executable), "Scripts")
-        streamlink_exe = "streamlink.exe" if sys.platform == "win32" else "streamlink"
-        local_path = os.path.join(scripts_path, streamlink_exe)
+    def ensure_subfolder(self, subfolder: str) -> str:
+        """Create a clip subfolder once and remember it for later downloads
         
-        if os.path.exists(local_path):
-            return local_path
-            
-        # Try PATH
-        path_streamlink = shutil.which(streamlink_exe)
-        if path_streamlink:
-            return path_streamlink
+        Args:
+            subfolder: Subfolder name inside the base folder
             
-        return None
+        Returns:
+            str: Path to the subfolder
+        """
+        folder_path = os.path.join(self.base_folder, subfolder)
+        if folder_path not in self._created_dirs:
+            os.makedirs(folder_path, exist_ok=True)
+            self._created_dirs.add(folder_path)
+        return folder_path
+        
+    def _clip_target(self, clip: Dict[str, Any], subfolder: str) -> Tuple[str, Optional[str]]:
+        """Output path for a clip, and its URL if it still has to be downloaded (None otherwise)"""
+        folder_path = self.ensure_subfolder(subfolder)
+        file_path = os.path.join(folder_path, f"{clip['broadcaster_name']}_{clip['id']}.mp4")
+        
+        # Skip if already downloaded
+        if os.path.exists(file_path):
+            print_header(f"Clip already exists: {os.path.basename(file_path)}")
+            return file_path, None
+        
+        clip_url = clip.get('url')
+        if not clip_url:
+            raise ValueError("No clip URL found in clip data")
+        return file_path, clip_url
         
     def download(self, clip: Dict[str, Any], subfolder: str) -> Optional[str]:
         """Download a clip using Streamlink
@@ -63,25 +132,50 @@ class ClipDownloader:
             str: Path to downloaded file if successful, None otherwise
         """
         try:
-            # Setup paths
-            folder_path = os.path.join(self.base_folder, subfolder)
-            os.makedirs(folder_path, exist_ok=True)
+            file_path, clip_url = self._clip_target(clip, subfolder)
+            if clip_url is None:
+                return file_path
             
-            file_path = os.path.join(folder_path, f"{clip['broadcaster_name']}_{clip['id']}.mp4")
+            # Download using Streamlink
+            result = self._run_streamlink(clip_url, file_path)
             
-            # Skip if already downloaded
-            if os.path.exists(file_path):
-                print_header(f"Clip already exists: {os.path.basename(file_path)}")
+            if result and os.path.exists(file_path):
                 return file_path
+            
+            print_error(f"Failed to download clip: {clip_url}")
+            return None
+            
+        except Exception as e:
+            print_error(f"Error downloading clip: {str(e)}")
+            return None
 
-            # Get clip URL
-            clip_url = clip.get('url')
-            if not clip_url:
-                print_error("No clip URL found in clip data")
-                return None
+    async def download_async(self, clip: Dict[str, Any], subfolder: str) -> Optional[str]:
+        """download() as a coroutine, so many clips can download on one event loop
+        
+        Streamlink runs as an asyncio subprocess, so a waiting download holds
+        no thread. With aiohttp and aiofiles installed, streamlink only resolves
+        the clip's MP4 URL and the file is fetched over one kept-alive HTTP
+        session; streamlink downloads it itself if that fails.
+        
+        Args:
+            clip: Clip data from Twitch API
+            subfolder: Subfolder name to store the clip in (usually today's date)
             
-            # Download using Streamlink
-            result = self._run_streamlink(clip_url, file_path)
+        Returns:
+            str: Path to downloaded file if successful, None otherwise
+        """
+        try:
+            file_path, clip_url = self._clip_target(clip, subfolder)
+            if clip_url is None:
+                return file_path
+            
+            if aiohttp is not None and aiofiles is not None:
+                stream_url = await self._resolve_stream_url(clip_url)
+                # Clips are plain MP4 files; anything else (e.g. HLS) is left to streamlink
+                if stream_url and '.m3u8' not in stream_url and await self._fetch_to_file(stream_url, file_path):
+                    return file_path
+            
+            result = await self._run_streamlink_async(clip_url, file_path)
             
             if result and os.path.exists(file_path):
                 return file_path
@@ -93,6 +187,91 @@ class ClipDownloader:
             print_error(f"Error downloading clip: {str(e)}")
             return None
 
+    async def _resolve_stream_url(self, url: str) -> Optional[str]:
+        """Direct URL of a clip's best stream, from streamlink --stream-url (None if it fails)"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.streamlink_path,
+                '--loglevel', 'error',
+                '--stream-url',  # Print the URL instead of downloading
+                url,
+                'best',
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return None
+            if process.returncode != 0:
+                return None
+            return stdout.decode('utf-8', errors='replace').strip() or None
+        except Exception:
+            return None
+
+    async def _fetch_to_file(self, url: str, file_path: str) -> bool:
+        """Download url to file_path over the shared HTTP session
+        
+        Returns:
+            bool: True if the file was written, False otherwise (nothing is left at file_path)
+        """
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=8, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=300)  # Same limit as a streamlink download
+            )
+        
+        # Written under a temporary name, so a failed download never looks like a finished clip
+        part_path = f"{file_path}.part"
+        try:
+            async with self._http.get(url) as response:
+                response.raise_for_status()
+                async with aiofiles.open(part_path, 'wb', buffering=DOWNLOAD_CHUNK_SIZE) as f:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+            os.replace(part_path, file_path)
+            return True
+        except Exception as e:
+            print_error(f"Direct download failed, retrying with streamlink: {str(e)}")
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            return False
+
+    async def close(self) -> None:
+        """Close the HTTP session used by download_async"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    def _streamlink_cmd(self, url: str, output_file: str) -> List[str]:
+        """Streamlink command line that downloads url to output_file"""
+        return [
+            self.streamlink_path,
+            '--stream-timeout', '30',  # Add timeout to prevent hanging
+            '--twitch-disable-hosting',  # Disable hosted streams
+            '--twitch-disable-ads',  # Skip ads
+            '--stream-segment-threads', str(self.hls_segment_threads),  # Fetch segments in parallel (--hls-segment-threads was removed in streamlink 7)
+            '--hls-playlist-reload-attempts', '2',
+            '--loglevel', 'error',  # Only errors on stderr
+            url,
+            'best',
+            '-o', output_file
+        ]
+
+    def _report_streamlink_error(self, error_msg: str) -> None:
+        """Print a readable message for a failed streamlink run"""
+        if "error: No plugin can handle URL" in error_msg:
+            print_error("Invalid clip URL or clip no longer available")
+        elif "error: 404 Client Error" in error_msg:
+            print_error("Clip not found (404)")
+        else:
+            print_error(f"Error running streamlink: {error_msg}")
+
     def _run_streamlink(self, url: str, output_file: str) -> bool:
         """Run Streamlink to download a clip
         
@@ -104,39 +283,82 @@ class ClipDownloader:
             bool: True if download was successful, False otherwise
         """
         try:
-            cmd = [
-                self.streamlink_path,
-                '--stream-timeout', '30',  # Add timeout to prevent hanging
-                '--twitch-disable-hosting',  # Disable hosted streams
-                '--twitch-disable-ads',  # Skip ads
-                url,
-                'best',
-                '-o', output_file
-            ]
+            cmd = self._streamlink_cmd(url, output_file)
             
-            process = subprocess.run(
+            # The clip is written to output_file, so stdout is discarded and only
+            # the tail of stderr is kept instead of buffering the whole output.
+            process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
-                text=True,
-                timeout=300  # 5 minute timeout
+                bufsize=1,
+                text=True
             )
+            stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+            reader = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+            reader.start()
+            
+            try:
+                process.wait(timeout=300)  # 5 minute timeout
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                reader.join(timeout=5)
+                process.stderr.close()
             
             if process.returncode == 0:
                 return True
                 
-            error_msg = process.stderr.strip()
-            if "error: No plugin can handle URL" in error_msg:
-                print_error("Invalid clip URL or clip no longer available")
-            elif "error: 404 Client Error" in error_msg:
-                print_error("Clip not found (404)")
-            else:
-                print_error(f"Error running streamlink: {error_msg}")
+            self._report_streamlink_error(''.join(stderr_tail).strip())
             return False
             
         except subprocess.TimeoutExpired:
             print_error("Download timed out after 5 minutes")
             return False
+        except Exception as e:
+            print_error(f"Error running streamlink: {str(e)}")
+            return False
+
+    async def _run_streamlink_async(self, url: str, output_file: str) -> bool:
+        """_run_streamlink on an asyncio subprocess
+        
+        Args:
+            url: URL of the clip to download
+            output_file: Path to save the downloaded file
+            
+        Returns:
+            bool: True if download was successful, False otherwise
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._streamlink_cmd(url, output_file),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+            
+            async def read_stderr():
+                async for line in process.stderr:
+                    stderr_tail.append(line.decode('utf-8', errors='replace'))
+                await process.wait()
+            
+            try:
+                await asyncio.wait_for(read_stderr(), timeout=300)  # 5 minute timeout
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                print_error("Download timed out after 5 minutes")
+                return False
+            
+            if process.returncode == 0:
+                return True
+            
+            self._report_streamlink_error(''.join(stderr_tail).strip())
+            return False
+            
         except Exception as e:
             print_error(f"Error running streamlink: {str(e)}")
             return False
\ No newline at end of file
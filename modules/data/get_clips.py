@@ -1,11 +1,42 @@
 """
 Module for fetching clips from Twitch API using TwitchAPI package
 """
-from typing import List, Dict, Any
+from typing import List, Any, AsyncIterator, NamedTuple
 import datetime
+import operator
 from twitchAPI.twitch import Twitch
 from modules.utils.logger import print_header, print_error, print_success
 
+class ClipRecord(NamedTuple):
+    """Compact clip record returned by ClipFetcher.get_clips
+    
+    Also supports read-only dict-style access (clip['title'], clip.get('id'))
+    so code written against the old per-clip dicts keeps working.
+    """
+    id: str
+    url: str
+    title: str
+    broadcaster_name: str
+    language: str
+    view_count: int
+    created_at: Any
+    thumbnail_url: str
+    game_id: str
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Only the record's fields, not tuple methods like count/index
+        return getattr(self, key) if key in self._fields else default
+
+# Fields copied from each twitchAPI Clip object, fetched in a single C-level call
+_CLIP_FIELDS = operator.attrgetter(*ClipRecord._fields)
+
 class ClipFetcher:
     def __init__(self, client_id: str, twitch: Twitch):
         """
@@ -25,7 +56,7 @@ class ClipFetcher:
         period: int,
         blacklisted_channels: List[str],
         language: str = 'en'
-    ) -> List[Dict[str, Any]]:
+    ) -> List[ClipRecord]:
         """
         Get clips from Twitch API
         
@@ -37,7 +68,24 @@ class ClipFetcher:
             language: Language filter for clips (default: 'en')
             
         Returns:
-            List of clip data dictionaries
+            List of clip records
+        """
+        return [clip async for clip in self.iter_clips(game_id, clips_amount, period,
+                                                       blacklisted_channels, language)]
+
+    async def iter_clips(
+        self,
+        game_id: int,
+        clips_amount: int,
+        period: int,
+        blacklisted_channels: List[str],
+        language: str = 'en'
+    ) -> AsyncIterator[ClipRecord]:
+        """
+        Yield clips from Twitch API as each page arrives, so callers can start on the
+        first clips while later pages are still being fetched
+        
+        Takes the same arguments as get_clips.
         """
         print_header(f"Getting {clips_amount} clips from Twitch")
         print_header(f"Search parameters: Game ID: {game_id}, Period: {period} days, Language: {language}")
@@ -48,105 +96,83 @@ class ClipFetcher:
             started_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=period)
             print_header(f"Searching clips from {started_at.strftime('%Y-%m-%d %H:%M:%S')} UTC onwards")
             
-            # Get clips using TwitchAPI - request much more to account for filtering
-            clips = []
-            request_amount = max(clips_amount * 10, 100)  # Request at least 100 clips
-            print_header(f"Requesting {request_amount} clips from Twitch API...")
+            # Filter clips while paginating and stop as soon as we have enough
+            limit = clips_amount * 2  # Get 2x the target amount for backup clips
+            max_scanned = max(clips_amount * 10, 100)  # Scan at most this many raw clips
+            print_header(f"Requesting up to {max_scanned} clips from Twitch API...")
+            
+            returned = 0
+            scanned = 0
+            skipped_language = 0
+            skipped_blacklisted = 0
+            skipped_missing_data = 0
+            error_count = 0
+            first_error = None
+            
+            # Resolve loop-invariant values once instead of per clip
+            blacklist = frozenset(channel.lower() for channel in blacklisted_channels)
+            language_lower = language.lower()
+            # "" and "any" both mean no language filter (see config/README.md)
+            check_language = language_lower not in ('', 'any')
             
             async for clip in self.twitch.get_clips(
                 game_id=str(game_id),
-                first=request_amount,
+                first=min(max_scanned, 100),  # Page size (Helix caps it at 100)
                 started_at=started_at
             ):
-                clips.append(clip)
-                if len(clips) >= request_amount:
+                scanned += 1
+                record = None
+                try:
+                    (clip_id, clip_url, title, broadcaster_name, clip_language,
+                     view_count, created_at, thumbnail_url, clip_game_id) = _CLIP_FIELDS(clip)
+                    
+                    # Skip non-matching language (but be more flexible)
+                    if check_language and clip_language and clip_language.lower() != language_lower:
+                        skipped_language += 1
+                    # Skip blacklisted channels
+                    elif broadcaster_name.lower() in blacklist:
+                        skipped_blacklisted += 1
+                    # Skip if missing required fields
+                    elif not (clip_id and clip_url and broadcaster_name):
+                        skipped_missing_data += 1
+                    else:
+                        # Convert Clip object to a record with needed fields
+                        record = ClipRecord(
+                            clip_id, clip_url, title, broadcaster_name, clip_language,
+                            view_count, created_at, thumbnail_url, clip_game_id
+                        )
+                            
+                except Exception as e:
+                    # Count failures and report once after the loop
+                    error_count += 1
+                    first_error = first_error or str(e)
+                
+                if record is not None:
+                    returned += 1
+                    yield record
+                
+                # Stop once we have enough clips or scanned the maximum
+                if returned >= limit or scanned >= max_scanned:
                     break
                     
-            print_header(f"Received {len(clips)} raw clips from API")
+            print_header(f"Received {scanned} raw clips from API")
+            
+            if error_count:
+                print_error(f"Error processing {error_count} clips; first: {first_error}")
             
-            if not clips:
+            if not scanned:
                 print_error("No clips found from API")
-                return []
+                return
 
-            # Filter and process clips with detailed logging
-            filtered_clips = self._filter_clips(
-                clips=clips,
-                language=language,
-                blacklisted_channels=blacklisted_channels,
-                limit=clips_amount * 2  # Get 2x the target amount for backup clips
-            )
+            # Print filtering summary
+            print_header(f"Filtering summary:")
+            print_header(f"  - Total clips processed: {scanned}")
+            print_header(f"  - Skipped for language ({language}): {skipped_language}")
+            print_header(f"  - Skipped for blacklisted channels: {skipped_blacklisted}")
+            print_header(f"  - Skipped for missing data: {skipped_missing_data}")
+            print_header(f"  - Final clips returned: {returned}")
 
-            print_success(f"Successfully fetched {len(filtered_clips)} clips after filtering")
-            return filtered_clips
+            print_success(f"Successfully fetched {returned} clips after filtering")
 
         except Exception as e:
             print_error(f"Failed to fetch clips: {str(e)}")
-            return []
-
-    def _filter_clips(
-        self,
-        clips: List[Any],
-        language: str,
-        blacklisted_channels: List[str],
-        limit: int
-    ) -> List[Dict[str, Any]]:
-        """Filter clips based on language and blacklisted channels"""
-        filtered = []
-        skipped_language = 0
-        skipped_blacklisted = 0
-        skipped_missing_data = 0
-        
-        print_header(f"Filtering {len(clips)} clips...")
-        
-        for clip in clips:
-            try:
-                # Get clip language
-                clip_language = getattr(clip, 'language', '').lower()
-                
-                # Skip non-matching language (but be more flexible)
-                if language.lower() != 'any' and clip_language and clip_language != language.lower():
-                    skipped_language += 1
-                    continue
-                    
-                # Skip blacklisted channels
-                broadcaster_name = getattr(clip, 'broadcaster_name', '').lower()
-                if broadcaster_name in map(str.lower, blacklisted_channels):
-                    skipped_blacklisted += 1
-                    continue
-                
-                # Convert Clip object to dictionary with needed fields
-                clip_data = {
-                    'id': getattr(clip, 'id', None),
-                    'url': getattr(clip, 'url', None),
-                    'title': getattr(clip, 'title', ''),
-                    'broadcaster_name': getattr(clip, 'broadcaster_name', ''),
-                    'language': getattr(clip, 'language', ''),
-                    'view_count': getattr(clip, 'view_count', 0),
-                    'created_at': getattr(clip, 'created_at', None),
-                    'thumbnail_url': getattr(clip, 'thumbnail_url', '')
-                }
-                
-                # Skip if missing required fields
-                if not all([clip_data['id'], clip_data['url'], clip_data['broadcaster_name']]):
-                    skipped_missing_data += 1
-                    continue
-                
-                filtered.append(clip_data)
-                
-                # Stop if we have enough clips
-                if len(filtered) >= limit:
-                    break
-                    
-            except Exception as e:
-                print_error(f"Error processing clip: {str(e)}")
-                continue
-        
-        # Print filtering summary
-        print_header(f"Filtering summary:")
-        print_header(f"  - Total clips processed: {len(clips)}")
-        print_header(f"  - Skipped for language ({language}): {skipped_language}")
-        print_header(f"  - Skipped for blacklisted channels: {skipped_blacklisted}")
-        print_header(f"  - Skipped for missing data: {skipped_missing_data}")
-        print_header(f"  - Final clips returned: {len(filtered)}")
-                
-        return filtered
\ No newline at end of file
@@ -3,24 +3,577 @@
 FFmpeg-based video processor for ultra-fast rendering
 Author: github.com/r-yeates
 """
+import atexit
+import copy
+import hashlib
 import os
+import re
 import subprocess
 import tempfile
+import threading
 import json
+import math
+import struct
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from modules.utils.logger import print_header, print_error, print_success
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    from PIL import ImageFont
+except ImportError:
+    ImageFont = None
+
+# Emojis and other Unicode symbols stripped from titles
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002500-\U00002BEF"  # chinese char
+    "\U00002702-\U000027B0"
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "\U0001f926-\U0001f937"
+    "\U00010000-\U0010ffff"
+    "\u2640-\u2642" 
+    "\u2600-\u2B55"
+    "\u200d"
+    "\u23cf"
+    "\u23e9"
+    "\u231a"
+    "\ufe0f"  # dingbats
+    "\u3030"
+    "]+", 
+    flags=re.UNICODE
+)
+
+# Anything other than word characters, whitespace and basic punctuation
+_NON_TITLE_RE = re.compile(r'[^\w\s\-.,!?()\'"]')
+
+# Escapes for drawtext text values and filter paths, applied in one C-level pass.
+# See: https://ffmpeg.org/ffmpeg-filters.html#drawtext-1
+_DRAWTEXT_ESCAPES = str.maketrans({"\\": "\\\\", "'": "'\\''", ":": "\\:", "%": "\\%"})
+# Paths go inside single quotes in filter arguments: '/' works on every platform, ':' is
+# escaped for the option parser and a quote closes the string, adds an escaped quote and reopens it
+_FILTER_PATH_ESCAPES = str.maketrans({"\\": "/", ":": "\\:", "'": "'\\\\\\''"})
+
+def _escape_drawtext(text: str) -> str:
+    """Escape text for an FFmpeg drawtext filter (single quotes become '\'')"""
+    return text.translate(_DRAWTEXT_ESCAPES)
+
+def _escape_filter_path(path: str) -> str:
+    """Escape a file path for use inside a single-quoted FFmpeg filter argument"""
+    return path.translate(_FILTER_PATH_ESCAPES)
+
+def _format_srt_timestamp(seconds: float) -> str:
+    """Convert seconds to SRT timestamp format (HH:MM:SS,mmm)"""
+    # Integer milliseconds avoid float modulo and boundary rounding errors
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+@lru_cache(maxsize=512)
+def _clean_title(text: str) -> str:
+    """Pure, cached implementation of FFmpegProcessor._clean_title_text"""
+    # Remove emojis
+    text = _EMOJI_RE.sub('', text)
+    
+    # Keep only ASCII letters, numbers, spaces, and basic punctuation
+    text = _NON_TITLE_RE.sub('', text)
+    
+    # Clean up multiple spaces and trim
+    text = ' '.join(text.split())
+    
+    return text.strip()
+
+@lru_cache(maxsize=512)
+def _wrap_title(text: str, max_chars_per_line: int) -> Tuple[str, ...]:
+    """Pure, cached line wrapping for FFmpegProcessor._split_title_text"""
+    if len(text) <= max_chars_per_line:
+        return (text,)
+    
+    words = text.split()
+    lines = []
+    current_line = ""
+    
+    for word in words:
+        # Check if adding this word would exceed the limit
+        test_line = current_line + (" " if current_line else "") + word
+        
+        if len(test_line) <= max_chars_per_line:
+            current_line = test_line
+        else:
+            # Start new line
+            if current_line:
+                lines.append(current_line)
+            current_line = word
+            
+            # If single word is too long, truncate it
+            if len(current_line) > max_chars_per_line:
+                current_line = current_line[:max_chars_per_line-3] + "..."
+    
+    # Add the last line
+    if current_line:
+        lines.append(current_line)
+    
+    # Limit to maximum 3 lines
+    if len(lines) > 3:
+        lines = lines[:2]
+        lines.append(lines[1][:max_chars_per_line-3] + "...")
+    
+    return tuple(lines)
+
+@lru_cache(maxsize=16)
+def _load_font(font_file: str, font_size: int):
+    """FreeType font for measuring title text, loaded once per (file, size); None if unavailable"""
+    if ImageFont is None:
+        return None
+    try:
+        return ImageFont.truetype(font_file, font_size)
+    except OSError:
+        return None
+
+def _truncate_to_width(text: str, measure, max_width: float) -> str:
+    """Shorten text until it fits max_width with a trailing '...'"""
+    while text and measure(text + "...") > max_width:
+        text = text[:-1]
+    return text + "..."
+
+@lru_cache(maxsize=1024)
+def _wrap_title_measured(text: str, font_file: str, font_size: int, max_width: int) -> Tuple[str, ...]:
+    """Like _wrap_title, but fits lines to measured glyph widths instead of a character count"""
+    measure = _load_font(font_file, font_size).getlength
+    if measure(text) <= max_width:
+        return (text,)
+    
+    lines = []
+    current_line = ""
+    
+    for word in text.split():
+        test_line = current_line + (" " if current_line else "") + word
+        
+        if measure(test_line) <= max_width:
+            current_line = test_line
+        else:
+            if current_line:
+                lines.append(current_line)
+            current_line = word
+            
+            # If single word is too wide, truncate it
+            if measure(current_line) > max_width:
+                current_line = _truncate_to_width(current_line, measure, max_width)
+    
+    if current_line:
+        lines.append(current_line)
+    
+    # Limit to maximum 3 lines
+    if len(lines) > 3:
+        lines = lines[:2] + [_truncate_to_width(lines[2], measure, max_width)]
+    
+    return tuple(lines)
+
+def _run_ffprobe(input_path: str) -> Dict[str, Any]:
+    """Run ffprobe on a file and return the parsed JSON output"""
+    cmd = [
+        "ffprobe", "-v", "quiet", "-print_format", "json",
+        "-show_format", "-show_streams", input_path
+    ]
+    
+    # Keep stdout as bytes; both JSON parsers accept it without a decode pass
+    result = subprocess.run(cmd, capture_output=True, timeout=30)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.decode(errors='replace')}")
+    return _json_loads(result.stdout)
+
+@lru_cache(maxsize=256)
+def _probe_cached(input_path: str, size: int, mtime_ns: int) -> Dict[str, Any]:
+    """ffprobe results keyed on (path, size, mtime) so unchanged files are probed once
+    
+    Failures raise and are therefore never cached.
+    """
+    return _run_ffprobe(input_path)
+
+def _run_duration_probe(video_path: str) -> float:
+    """Read a file's duration with ffprobe; raises if ffprobe fails"""
+    cmd = [
+        "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+        "-of", "csv=p=0", video_path
+    ]
+    
+    # float() parses the bytes output directly, and stderr is never read
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=30)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, cmd)
+    return float(result.stdout.strip())
+
+def _iter_mp4_boxes(f, descend: frozenset):
+    """Yield the type of each MP4 box in f, with f positioned at its payload
+    
+    Boxes are walked by seeking over their payloads; container types in descend
+    are entered instead, so their children are yielded next.
+    """
+    end = os.fstat(f.fileno()).st_size
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+        elif size == 0:
+            size = end - start
+        if size < 8:
+            return
+        if box_type in descend:
+            continue
+        yield box_type
+        f.seek(start + size)
+
+def _read_mp4_duration(video_path: str) -> Optional[float]:
+    """Duration from an MP4/MOV file's moov/mvhd box, or None if it isn't one (or has no usable mvhd)"""
+    try:
+        with open(video_path, 'rb') as f:
+            for box_type in _iter_mp4_boxes(f, frozenset((b'moov',))):
+                if box_type == b'mvhd':
+                    version = f.read(1)[0]
+                    f.read(3)  # flags
+                    if version == 1:
+                        _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                    else:
+                        _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                    # Fragmented files leave the duration at 0 (or all ones) here
+                    if not timescale or duration in (0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+                        return None
+                    return duration / timescale
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+def _read_mp4_dimensions(video_path: str) -> Optional[Tuple[int, int]]:
+    """Width and height of the first video track from its moov/trak/tkhd box, or None"""
+    try:
+        with open(video_path, 'rb') as f:
+            for box_type in _iter_mp4_boxes(f, frozenset((b'moov', b'trak'))):
+                if box_type == b'tkhd':
+                    version = f.read(1)[0]
+                    # Skip flags, times, track ID and duration, then layer/volume/matrix
+                    f.seek((35 if version == 1 else 23) + 52, os.SEEK_CUR)
+                    width, height = struct.unpack(">II", f.read(8))
+                    # 16.16 fixed point; audio tracks are 0x0
+                    if width >> 16 and height >> 16:
+                        return width >> 16, height >> 16
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+@lru_cache(maxsize=256)
+def _duration_cached(video_path: str, size: int, mtime_ns: int) -> float:
+    """Durations keyed on (path, size, mtime), like _probe_cached"""
+    # MP4 durations are read straight from the header; other containers go through ffprobe
+    duration = _read_mp4_duration(video_path)
+    if duration is None:
+        duration = _run_duration_probe(video_path)
+    return duration
+
+@lru_cache(maxsize=1)
+def _detect_ffmpeg() -> str:
+    """Find FFmpeg executable (probed once per process; failures are not cached)"""
+    # Try common locations
+    possible_paths = [
+        "ffmpeg",  # System PATH
+        "ffmpeg.exe",  # Windows
+        r"C:\ffmpeg\bin\ffmpeg.exe",
+        r"C:\Program Files\ffmpeg\bin\ffmpeg.exe",
+        "/usr/bin/ffmpeg",  # Linux
+        "/usr/local/bin/ffmpeg",  # macOS
+    ]
+    
+    for path in possible_paths:
+        try:
+            # Only the exit code matters here
+            result = subprocess.run([path, "-version"], stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL, timeout=5)
+            if result.returncode == 0:
+                print_success(f"Found FFmpeg at: {path}")
+                return path
+        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+            continue
+            
+    raise RuntimeError("FFmpeg not found! Please install FFmpeg and add it to your PATH")
+
+@lru_cache(maxsize=4)
+def _ffmpeg_encoders(ffmpeg_path: str) -> frozenset:
+    """Names of the encoders this FFmpeg build supports (probed once per binary)"""
+    try:
+        result = subprocess.run([ffmpeg_path, "-hide_banner", "-encoders"],
+                                capture_output=True, text=True, timeout=10)
+    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+        return frozenset()
+    if result.returncode != 0:
+        return frozenset()
+    
+    # Encoder lines look like " V....D h264_nvenc  NVIDIA NVENC H.264 encoder"
+    return frozenset(
+        parts[1] for parts in (line.split() for line in result.stdout.splitlines())
+        if len(parts) > 1 and len(parts[0]) == 6
+    )
+
+@lru_cache(maxsize=4)
+def _nvenc_usable(ffmpeg_path: str) -> bool:
+    """Whether h264_nvenc can actually encode here (probed once per binary)
+    
+    Many builds list the encoder without an NVIDIA GPU or driver, so encode one frame to find out.
+    """
+    try:
+        result = subprocess.run([ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                                 "-f", "lavfi", "-i", "nullsrc", "-frames:v", "1",
+                                 "-c:v", "h264_nvenc", "-f", "null", "-"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15)
+    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+# Lines of FFmpeg stderr kept for error reporting
+STDERR_TAIL_LINES = 200
+
+def _run_ffmpeg(cmd: List[str], timeout: float) -> Tuple[int, str]:
+    """Run an FFmpeg command and return (returncode, last lines of stderr)
+    
+    stderr is streamed into a ring buffer instead of being collected in full, and
+    subprocess.TimeoutExpired is raised (after killing FFmpeg) like subprocess.run does.
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        bufsize=1,
+        text=True,
+        errors='replace'
+    )
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    reader = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+    reader.start()
+    
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        reader.join(timeout=5)
+        process.stderr.close()
+    
+    return process.returncode, ''.join(stderr_tail)
+
+# Per-spawn overhead: never poll stdin for commands (FFmpeg otherwise reads the terminal,
+# which also stalls background workers), skip the banner and only log errors
+FFMPEG_QUIET_ARGS = ["-nostdin", "-hide_banner", "-loglevel", "error"]
+
+# Placeholders in FFmpegProcessor._cmd_template for the per-clip input and output paths
+_INPUT_PATH = object()
+_OUTPUT_PATH = object()
+
+
+def _remove_source(path: str):
+    """Delete a rendered source clip, dropping it from the page cache first where supported"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    os.remove(path)
+
+@lru_cache(maxsize=4)
+def _drawtext_options(ffmpeg_path: str) -> frozenset:
+    """Names of the drawtext filter's options in this FFmpeg build (probed once per binary)"""
+    try:
+        result = subprocess.run([ffmpeg_path, "-hide_banner", "-h", "filter=drawtext"],
+                                capture_output=True, text=True, timeout=10)
+    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+        return frozenset()
+    if result.returncode != 0:
+        return frozenset()
+    
+    # Option lines look like "  text_align        <flags>      ..FV....... set text alignment"
+    return frozenset(
+        line.split()[0] for line in result.stdout.splitlines()
+        if line.startswith("  ") and line.strip()
+    )
+
+# Hardware H.264 encoders that can be selected with encoding.VIDEO_CODEC
+HW_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_vaapi")
+
+def _video_encoder_args(video_codec: str, preset: str, crf: Any, profile: str, tune: str) -> List[str]:
+    """FFmpeg video encoder arguments, mapping PRESET/CRF onto each encoder's own options"""
+    if video_codec == "h264_nvenc":
+        # NVENC has its own presets (p1-p7) and uses -cq as its constant quality setting
+        return ["-c:v", video_codec, "-preset", "p5", "-tune", "hq",
+                "-rc", "vbr", "-cq", str(crf), "-b:v", "0", "-profile:v", profile]
+    if video_codec == "h264_qsv":
+        return ["-c:v", video_codec, "-preset", preset, "-global_quality", str(crf),
+                "-look_ahead", "1", "-profile:v", profile]
+    if video_codec == "h264_vaapi":
+        return ["-c:v", video_codec, "-qp", str(crf), "-profile:v", profile]
+    return [
+        # High-quality encoding settings
+        "-c:v", video_codec,
+        "-preset", preset,  # Better quality, reasonable speed
+        "-crf", str(crf),  # Higher quality (lower is better, 18-20 is "visually lossless")
+        "-profile:v", profile,  # Use high profile for better quality
+        "-tune", tune,  # Tune for general film content
+    ]
+
+@lru_cache(maxsize=4)
+def _detect_meme_font(font_priorities: Tuple[str, ...], default_font: str) -> str:
+    """Return the first existing font from the priority list (cached per list)"""
+    for font_path in font_priorities:
+        if os.path.exists(font_path):
+            return font_path
+    
+    # If no fonts found, return the default from config
+    return default_font
+
+# Render worker pool shared by every process_clips_batch call, so worker processes
+# (and their imports) are started once per run rather than once per batch
+_RENDER_POOL = None
+_RENDER_POOL_WORKERS = 0
+
+def _render_pool(workers: int):
+    """Return the shared render ProcessPoolExecutor, recreating it if the size changes"""
+    global _RENDER_POOL, _RENDER_POOL_WORKERS
+    if _RENDER_POOL is None or _RENDER_POOL_WORKERS != workers:
+        # Join the old workers before starting the new ones
+        shutdown_render_pool()
+        _RENDER_POOL = ProcessPoolExecutor(max_workers=workers)
+        _RENDER_POOL_WORKERS = workers
+    return _RENDER_POOL
+
+def shutdown_render_pool():
+    """Stop the shared render worker processes (they are started again on the next batch)"""
+    global _RENDER_POOL, _RENDER_POOL_WORKERS
+    if _RENDER_POOL is not None:
+        _RENDER_POOL.shutdown(wait=True)
+        _RENDER_POOL = None
+        _RENDER_POOL_WORKERS = 0
+
+atexit.register(shutdown_render_pool)
+
+def _process_clip_job(job: Tuple[Any, str, Dict[str, Any], Optional[List[Dict]], Dict[str, Any]]) -> Optional[str]:
+    """Worker entry point for FFmpegProcessor.process_clips_batch"""
+    processor, input_path, clip, subtitle_data, kwargs = job
+    return processor.process_clip(input_path, clip, subtitle_data=subtitle_data, **kwargs)
+
 class FFmpegProcessor:
     def __init__(self, config: dict = None):
         """Initialize FFmpeg processor with optional configuration"""
         self.ffmpeg_path = self._find_ffmpeg()
         self.temp_dir = tempfile.gettempdir()
         self.config = config or {}
+        # FFmpeg threads per render (0 = let FFmpeg use every core)
+        self.threads = 0
+        # Processor this one was split from (see split_for_parallel), told about encoder fallbacks
+        self._parent = None
         
+        # Config sections, resolved once; the config is fixed for the processor's lifetime
+        self._video_cfg = self.config.get('video', {})
+        self._encoding_cfg = self.config.get('encoding', {})
+        self._title_cfg = self.config.get('title_style', {})
+        self._title_pos_cfg = self.config.get('title_positioning', {})
+        self._fonts_cfg = self.config.get('fonts', {})
+        self._watermark_cfg = self.config.get('watermark', {})
+        self._subtitles_cfg = self.config.get('subtitles', {})
+        self._audio_cfg = self.config.get('audio_processing', {})
+        
+        # Filter fragments that only depend on the config, built once instead of per clip
+        self._watermark_filter_str = self._create_watermark_filter(
+            self._video_cfg.get('VIDEO_WIDTH', 1080), self._video_cfg.get('VIDEO_HEIGHT', 1920))
+        self._bg_blur_filter_str = self._create_bg_blur_filter()
+        # Layout graphs built by _layout_filters, keyed by the options that shape them
+        self._layout_cache: Dict[Tuple, Tuple[str, ...]] = {}
+        
+        # Output options that only depend on the config, shared by every render command
+        encoding_config = self._encoding_cfg
+        self._output_args = (
+            "-r", str(encoding_config.get('FRAMERATE', '30')),  # Higher framerate for smoother motion
+            
+            # Better audio settings
+            "-c:a", encoding_config.get('AUDIO_CODEC', 'aac'),
+            "-b:a", encoding_config.get('AUDIO_BITRATE', '192k'),  # Higher audio bitrate
+            
+            # Fragmented output is written in one pass; faststart rewrites the file to move the index
+            "-movflags", ("+empty_moov+frag_keyframe+default_base_moof"
+                          if encoding_config.get('FRAGMENTED_MP4', False) else "+faststart"),
+            "-write_tmcd", "0",  # No timecode track
+            
+            # Trim to configured duration if needed
+            "-t", str(encoding_config.get('MAX_DURATION_SECONDS', 59)),
+        )
+        # Render command around the per-clip filter graph and encoder, with path placeholders
+        self._cmd_template = self._build_template()
+        
+        # Optional hardware encoder (a hardware VIDEO_CODEC, or USE_NVENC), only if this FFmpeg build has it
+        performance_config = self.config.get('performance', {})
+        video_codec = self._encoding_cfg.get('VIDEO_CODEC', 'libx264')
+        if performance_config.get('USE_NVENC', False):
+            video_codec = 'h264_nvenc'
+        elif video_codec == 'auto':
+            # NVENC whenever this FFmpeg build has it and a test encode works
+            usable = 'h264_nvenc' in _ffmpeg_encoders(self.ffmpeg_path) and _nvenc_usable(self.ffmpeg_path)
+            video_codec = 'h264_nvenc' if usable else 'libx264'
+        # CPU encoder used without (or after a failed) hardware encode
+        self._cpu_codec = 'libx264' if video_codec in HW_ENCODERS else video_codec
+        self.hw_encoder = video_codec if video_codec in HW_ENCODERS else None
+        if self.hw_encoder and self.hw_encoder not in _ffmpeg_encoders(self.ffmpeg_path):
+            print_error(f"{self.hw_encoder} is selected but FFmpeg doesn't have this encoder, using CPU encoding")
+            self.hw_encoder = None
+        elif self.hw_encoder == 'h264_nvenc' and not _nvenc_usable(self.ffmpeg_path):
+            print_error("h264_nvenc is selected but no usable NVIDIA GPU was found, using CPU encoding")
+            self.hw_encoder = None
+        self.vaapi_device = performance_config.get('VAAPI_DEVICE', '/dev/dri/renderD128')
+        # "cuda" keeps NVENC renders' decoded frames on the GPU through the main video downscale
+        self.hwaccel = self._video_cfg.get('HWACCEL', 'none')
+        
+    def _build_template(self) -> Tuple[Tuple[Any, ...], Tuple[Any, ...]]:
+        """Input and output halves of the render command, which only depend on the config and threads"""
+        filter_threads = str(self.threads or os.cpu_count() or 1)
+        input_args = (
+            self.ffmpeg_path,
+            "-i", _INPUT_PATH,
+            "-y",  # Overwrite output
+            *FFMPEG_QUIET_ARGS,
+        )
+        output_args = (
+            *self._output_args,
+            
+            # Performance optimizations
+            "-threads", str(self.threads),  # 0 uses all CPU threads
+            "-filter_complex_threads", filter_threads,  # Run the filter graph in parallel
+            "-filter_threads", filter_threads,
+            
+            _OUTPUT_PATH
+        )
+        return input_args, output_args
+    
     def _find_meme_font(self) -> str:
         """Find the best available font for meme-style text on Windows"""
         # Get font priorities from config
-        fonts_config = self.config.get('fonts', {})
+        fonts_config = self._fonts_cfg
         font_priorities = fonts_config.get('FONT_PRIORITIES', [
             "C:/Windows/Fonts/ariblk.ttf",     # Arial Black (best for memes)
             "C:/Windows/Fonts/impact.ttf",     # Impact (classic meme font)
@@ -28,16 +581,19 @@ class FFmpegProcessor:
             "C:/Windows/Fonts/arial.ttf"       # Arial (fallback)
         ])
         
-        for font_path in font_priorities:
-            if os.path.exists(font_path):
-                return font_path
-        
-        # If no fonts found, return the default from config
-        return fonts_config.get('DEFAULT_FONT_PATH', "C:/Windows/Fonts/arialbd.ttf")
+        return _detect_meme_font(
+            tuple(font_priorities),
+            fonts_config.get('DEFAULT_FONT_PATH', "C:/Windows/Fonts/arialbd.ttf")
+        )
     
-    def _create_meme_title_filter(self, text: str, video_width: int, video_height: int, line_index: int = 0, total_lines: int = 1) -> str:
-        """Create FFmpeg drawtext filter for meme-style title text with proper margins"""
-        title_config = self.config.get('title_style', {})
+    def _create_meme_title_filter(self, text: str, video_width: int, video_height: int, line_index: int = 0, total_lines: int = 1,
+                                  text_file: str = None) -> str:
+        """Create FFmpeg drawtext filter for meme-style title text with proper margins
+        
+        If text_file (an escaped path) is given, it holds all total_lines lines and they are
+        drawn by this one filter instead of one filter per line.
+        """
+        title_config = self._title_cfg
         
         # Get meme-style configuration with defaults
         font_size_multiplier = title_config.get('FONT_SIZE_MULTIPLIER', 0.09)
@@ -56,24 +612,33 @@ class FFmpegProcessor:
         
         # Get the best meme font
         font_file = self._find_meme_font()
-        font_file_escaped = font_file.replace("\\", "/").replace(":", "\\:")
+        font_file_escaped = _escape_filter_path(font_file)
         
         # Escape text for FFmpeg: single quotes must be handled as '\''
-        # See: https://ffmpeg.org/ffmpeg-filters.html#drawtext-1
-        escaped_text = text.replace("\\", "\\\\").replace("'", "'\\''").replace(":", "\\:").replace("%", "\\%")
+        escaped_text = _escape_drawtext(text)
         
         # Calculate Y position for multi-line titles
         if total_lines == 1:
             y_pos = 200  # Single line centered
+            line_step = 0
         elif total_lines == 2:
-            y_pos = 170 + (line_index * 70)  # Two lines: 170, 240
+            line_step = 70
+            y_pos = 170 + (line_index * line_step)  # Two lines: 170, 240
         else:
             # Three lines: 140, 200, 260
-            y_pos = 140 + (line_index * 60)
+            line_step = 60
+            y_pos = 140 + (line_index * line_step)
+        
+        if text_file:
+            # All lines at once: centre each one and keep the same distance between them
+            text_parts = [f"textfile='{text_file}'", "expansion=none", "text_align=C",
+                          f"line_spacing={line_step - font_size}"]
+        else:
+            text_parts = [f"text='{escaped_text}'"]
         
         # Build the drawtext filter with meme-style formatting and safe margins
         filter_parts = [
-            f"text='{escaped_text}'",
+            *text_parts,
             f"fontfile='{font_file_escaped}'",
             f"fontsize={font_size}",
             f"fontcolor={text_color}",
@@ -97,7 +662,7 @@ class FFmpegProcessor:
         
     def _create_watermark_filter(self, video_width: int, video_height: int) -> str:
         """Create FFmpeg drawtext filter for watermark"""
-        watermark_config = self.config.get('watermark', {})
+        watermark_config = self._watermark_cfg
         
         # Return empty string if watermark is disabled
         if not watermark_config.get('ENABLE_WATERMARK', False):
@@ -111,11 +676,11 @@ class FFmpegProcessor:
         margin_y = watermark_config.get('WATERMARK_MARGIN_Y', 20)
         
         # Use the same font as the title for consistency, or default from config
-        font_file = self.config.get('subtitles', {}).get('FONT_FILE') or self.config.get('fonts', {}).get('DEFAULT_FONT_PATH', 'C:/Windows/Fonts/arial.ttf')
+        font_file = self._subtitles_cfg.get('FONT_FILE') or self._fonts_cfg.get('DEFAULT_FONT_PATH', 'C:/Windows/Fonts/arial.ttf')
         
         # Escape special characters for FFmpeg
-        text_escaped = watermark_text.replace("\\", "\\\\").replace("'", "'\\''").replace(":", "\\:").replace("%", "\\%")
-        font_file_escaped = font_file.replace("\\", "/").replace(":", "\\:")
+        text_escaped = _escape_drawtext(watermark_text)
+        font_file_escaped = _escape_filter_path(font_file)
         
         # Build filter parts for bottom-left positioning
         filter_parts = [
@@ -129,47 +694,52 @@ class FFmpegProcessor:
         
         return ":".join(filter_parts)
         
+    def _create_bg_blur_filter(self) -> str:
+        """Create the FFmpeg filter chain for the blurred background (scale, crop, blur, darken)"""
+        video_config = self._video_cfg
+        video_width = video_config.get('VIDEO_WIDTH', 1080)
+        video_height = video_config.get('VIDEO_HEIGHT', 1920)
+        
+        # Two Gaussian passes compose into one with sigma = sqrt(s1^2 + s2^2),
+        # so a single pass gives the same look with half the memory traffic
+        blur_sigma = round(math.hypot(video_config.get('BLUR_SIGMA_1', 10),
+                                      video_config.get('BLUR_SIGMA_2', 15)), 2)
+        
+        # Slightly darken the blurred background to make main video stand out better
+        bg_brightness = video_config.get('BACKGROUND_BRIGHTNESS', -0.1)
+        
+        return (f"scale={video_width}:{video_height}:force_original_aspect_ratio=increase,"
+                f"crop={video_width}:{video_height},gblur=sigma={blur_sigma},eq=brightness={bg_brightness}")
+        
     def _find_ffmpeg(self) -> str:
         """Find FFmpeg executable"""
-        # Try common locations
-        possible_paths = [
-            "ffmpeg",  # System PATH
-            "ffmpeg.exe",  # Windows
-            r"C:\ffmpeg\bin\ffmpeg.exe",
-            r"C:\Program Files\ffmpeg\bin\ffmpeg.exe",
-            "/usr/bin/ffmpeg",  # Linux
-            "/usr/local/bin/ffmpeg",  # macOS
-        ]
-        
-        for path in possible_paths:
-            try:
-                result = subprocess.run([path, "-version"], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    print_success(f"Found FFmpeg at: {path}")
-                    return path
-            except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-                continue
-                
-        raise RuntimeError("FFmpeg not found! Please install FFmpeg and add it to your PATH")
+        return _detect_ffmpeg()
     
     def get_video_info(self, input_path: str) -> Dict[str, Any]:
-        """Get video information using ffprobe"""
-        cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_format", "-show_streams", input_path
-        ]
-        
+        """Get video information using ffprobe (cached while the file is unchanged)"""
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            else:
-                raise RuntimeError(f"ffprobe failed: {result.stderr}")
+            try:
+                st = os.stat(input_path)
+            except OSError:
+                # Can't key the cache, probe directly
+                return _run_ffprobe(input_path)
+            return _probe_cached(input_path, st.st_size, st.st_mtime_ns)
         except Exception as e:
             print_error(f"Error getting video info: {e}")
             return {}
     
+    def probe_dimensions(self, input_path: str) -> Optional[Tuple[int, int]]:
+        """Width and height of the first video stream, or None if they can't be read"""
+        # MP4 track headers carry the size, so the common case needs no ffprobe process
+        dimensions = _read_mp4_dimensions(input_path)
+        if dimensions:
+            return dimensions
+        for stream in self.get_video_info(input_path).get('streams', ()):
+            if stream.get('codec_type') == 'video':
+                width, height = stream.get('width'), stream.get('height')
+                return (width, height) if width and height else None
+        return None
+    
     def create_subtitle_file(self, subtitle_data: List[Dict], output_path: str) -> bool:
         """Create SRT subtitle file for FFmpeg with TikTok-style timing"""
         try:
@@ -177,8 +747,16 @@ class FFmpegProcessor:
                 print_error("No subtitle data available")
                 return False
             
-            # First, collect all subtitle chunks with their timing
+            # Collect (start, end, text) for every chunk. Segments normally arrive in
+            # time order, so the sort is only needed when one starts out of order
             subtitle_chunks = []
+            in_order = True
+            
+            def add_chunk(text: str, start: float, end: float):
+                nonlocal in_order
+                if subtitle_chunks and start < subtitle_chunks[-1][0]:
+                    in_order = False
+                subtitle_chunks.append((start, end, text))
             
             for segment in subtitle_data:
                 if not segment.get('text', '').strip():
@@ -204,11 +782,7 @@ class FFmpegProcessor:
                         # Make text uppercase for TikTok style
                         display_text = chunk_text.upper()
                         
-                        subtitle_chunks.append({
-                            'text': display_text,
-                            'start': start_time,
-                            'end': end_time
-                        })
+                        add_chunk(display_text, start_time, end_time)
                         
                 else:
                     # Fallback: split text into smart chunks for TikTok style
@@ -233,273 +807,145 @@ class FFmpegProcessor:
                             # Make text uppercase for TikTok style
                             display_text = chunk_text.upper()
                             
-                            subtitle_chunks.append({
-                                'text': display_text,
-                                'start': chunk_start,
-                                'end': chunk_end
-                            })
-            
-            # Sort chunks by start time
-            subtitle_chunks.sort(key=lambda x: x['start'])
-            
-            # Fix overlapping subtitles - ensure each subtitle ends before the next one starts
-            for i in range(len(subtitle_chunks) - 1):
-                current_chunk = subtitle_chunks[i]
-                next_chunk = subtitle_chunks[i + 1]
-                
-                # If current subtitle overlaps with next one, cut it short
-                if current_chunk['end'] > next_chunk['start']:
-                    # Leave a small gap (0.1 seconds) between subtitles
-                    gap = 0.1
-                    current_chunk['end'] = max(current_chunk['start'] + 0.3, next_chunk['start'] - gap)
+                            add_chunk(display_text, chunk_start, chunk_end)
+            
+            if not in_order:
+                subtitle_chunks.sort(key=lambda chunk: chunk[0])
             
-            # Write the non-overlapping subtitles to file
+            # Fix overlaps and format the SRT in one pass - each subtitle must end before
+            # the next one starts
+            to_srt = _format_srt_timestamp
+            entries = []
+            last = len(subtitle_chunks) - 1
+            for i, (start, end, text) in enumerate(subtitle_chunks):
+                if i < last:
+                    next_start = subtitle_chunks[i + 1][0]
+                    # If current subtitle overlaps with next one, cut it short
+                    if end > next_start:
+                        # Leave a small gap (0.1 seconds) between subtitles
+                        end = max(start + 0.3, next_start - 0.1)
+                entries.append(f"{i + 1}\n{to_srt(start)} --> {to_srt(end)}\n{text}\n\n")
+            
+            # Write the non-overlapping subtitles to file in a single call
+            srt_content = "".join(entries)
             with open(output_path, 'w', encoding='utf-8') as f:
-                for i, chunk in enumerate(subtitle_chunks, 1):
-                    start_srt = self._seconds_to_srt_time(chunk['start'])
-                    end_srt = self._seconds_to_srt_time(chunk['end'])
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_srt} --> {end_srt}\n")
-                    f.write(f"{chunk['text']}\n\n")
+                f.write(srt_content)
             return True
             
         except Exception as e:
             print_error(f"Error creating TikTok-style subtitle file: {e}")
             return False
     
-    def _seconds_to_srt_time(self, seconds: float) -> str:
-        """Convert seconds to SRT time format (HH:MM:SS,mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-    
-    def _create_smart_chunks(self, words_data: List[Dict]) -> List[List[Dict]]:
-        """Create smart word chunks that avoid orphaned single words and respect character limits"""
-        if not words_data:
+    @staticmethod
+    def _chunk(words: List[Any], get_text, get_start=None, get_end=None,
+               max_chars: int = 20, max_words: int = 4,
+               max_dur: float = 1.5, pause_break: float = 0.2) -> List[List[Any]]:
+        """Greedily group words into subtitle chunks in a single pass
+        
+        Args:
+            words: Words to group (word dicts or plain strings)
+            get_text: Returns the display text of a word
+            get_start: Returns a word's start time (enables pause/duration breaks)
+            get_end: Returns a word's end time
+            max_chars: Maximum characters per chunk, including spaces
+            max_words: Maximum words per chunk
+            max_dur: Maximum chunk duration in seconds (timed words only)
+            pause_break: Start a new chunk after a pause longer than this (timed words only)
+        """
+        if not words:
             return []
         
-        # Check if the entire phrase should be kept together
-        all_words_text = ' '.join([w['word'].strip() for w in words_data])
-        if len(words_data) > 3 and len(all_words_text) <= 20:
-            return [words_data]
+        lengths = [len(get_text(w)) for w in words]
+        count = len(words)
+        
+        # Keep short phrases together
+        if count > 3 and sum(lengths) + count - 1 <= max_chars:
+            return [list(words)]
         
+        timed = get_start is not None and get_end is not None
         chunks = []
+        chunk_lengths = []
         i = 0
         
-        while i < len(words_data):
-            current_chunk = [words_data[i]]
-            current_text = words_data[i]['word'].strip()
+        while i < count:
+            cur_len = lengths[i]
+            cur_start = get_start(words[i]) if timed else 0.0
             j = i + 1
             
-            # Look ahead to see how many words are left
-            remaining_words = len(words_data) - j
-            
-            # Add words to current chunk if they fit timing and character constraints
-            while j < len(words_data) and len(current_chunk) < 4:  # Max 4 words
-                # Check timing gap
-                gap = words_data[j]['start'] - words_data[j-1]['end']
-                if gap > 0.2:  # Break on pauses
-                    break
-                if words_data[j]['end'] - current_chunk[0]['start'] > 1.5:  # Max 1.5s per chunk
-                    break
-                
-                # Check character limit
-                test_text = current_text + ' ' + words_data[j]['word'].strip()
-                if len(test_text) > 20:
+            while j < count and j - i < max_words:
+                if timed:
+                    if get_start(words[j]) - get_end(words[j - 1]) > pause_break:  # Break on pauses
+                        break
+                    if get_end(words[j]) - cur_start > max_dur:  # Max duration per chunk
+                        break
+                if cur_len + 1 + lengths[j] > max_chars:  # Character limit
                     break
-                
-                current_chunk.append(words_data[j])
-                current_text = test_text
+                cur_len += 1 + lengths[j]
                 j += 1
             
-            # Smart orphan prevention
-            remaining_after_chunk = len(words_data) - j
-            
-            # If we'd leave exactly 1 word orphaned, include it if it fits
-            if remaining_after_chunk == 1 and len(current_chunk) < 4:
-                test_text = current_text + ' ' + words_data[j]['word'].strip()
-                if len(test_text) <= 20:
-                    current_chunk.append(words_data[j])
-                    j += 1
-            # If we have 2 words left and current chunk has only 1 word, try to take one more
-            elif remaining_after_chunk == 2 and len(current_chunk) == 1:
-                test_text = current_text + ' ' + words_data[j]['word'].strip()
-                if len(test_text) <= 20:
-                    current_chunk.append(words_data[j])
-                    j += 1
-            
-            if current_chunk:
-                chunks.append(current_chunk)
-            
+            chunks.append(words[i:j])
+            chunk_lengths.append(cur_len)
             i = j
         
+        # Don't leave a single orphaned word at the end: absorb it into the previous
+        # chunk if it fits, otherwise pair it with the previous chunk's last word
+        if len(chunks) > 1 and len(chunks[-1]) == 1:
+            prev, orphan = chunks[-2], chunks[-1]
+            if len(prev) < max_words and chunk_lengths[-2] + 1 + chunk_lengths[-1] <= max_chars:
+                chunks[-2:] = [prev + orphan]
+            elif len(prev) > 2 and lengths[-2] + 1 + lengths[-1] <= max_chars:
+                chunks[-2:] = [prev[:-1], prev[-1:] + orphan]
+        
         return chunks
     
+    def _create_smart_chunks(self, words_data: List[Dict]) -> List[List[Dict]]:
+        """Create smart word chunks that avoid orphaned single words and respect character limits"""
+        return self._chunk(
+            words_data,
+            get_text=lambda w: w['word'].strip(),
+            get_start=lambda w: w['start'],
+            get_end=lambda w: w['end']
+        )
+    
     def _create_smart_text_chunks(self, words: List[str]) -> List[List[str]]:
         """Create smart text chunks that avoid orphaned single words and respect character limits"""
-        if not words:
-            return []
-        
-        # Calculate total character count for the phrase
-        total_text = ' '.join(words)
-        total_chars = len(total_text)
-        
-        # If it's more than 3 words AND under 20 characters, keep it together
-        if len(words) > 3 and total_chars <= 20:
-            return [words]
-        
-        # If it's 3 words or less, keep together regardless of character count
-        if len(words) <= 3:
-            return [words]
-        
-        # For longer phrases, use smart chunking
-        chunks = []
-        i = 0
-        
-        while i < len(words):
-            remaining = len(words) - i
-            
-            if remaining == 1:
-                # Single word left - add to previous chunk if possible
-                if chunks and len(' '.join(chunks[-1]) + ' ' + words[i]) <= 20:
-                    chunks[-1].append(words[i])
-                else:
-                    chunks.append([words[i]])
-                break
-            elif remaining == 2:
-                # Two words left - check if they fit in 20 chars
-                two_word_text = ' '.join(words[i:i+2])
-                if len(two_word_text) <= 20:
-                    chunks.append(words[i:i+2])
-                else:
-                    # Split them if too long
-                    chunks.append([words[i]])
-                    chunks.append([words[i+1]])
-                break
-            elif remaining == 3:
-                # Three words left - check if they fit in 20 chars
-                three_word_text = ' '.join(words[i:i+3])
-                if len(three_word_text) <= 20:
-                    chunks.append(words[i:i+3])
-                else:
-                    # Try 2+1 split
-                    two_word_text = ' '.join(words[i:i+2])
-                    if len(two_word_text) <= 20:
-                        chunks.append(words[i:i+2])
-                        chunks.append([words[i+2]])
-                    else:
-                        # Split as 1+1+1
-                        chunks.append([words[i]])
-                        chunks.append([words[i+1]])
-                        chunks.append([words[i+2]])
-                break
-            elif remaining == 4:
-                # Four words - try to split evenly while respecting char limit
-                four_word_text = ' '.join(words[i:i+4])
-                if len(four_word_text) <= 20:
-                    chunks.append(words[i:i+4])
-                    break
-                else:
-                    # Try 2+2 split
-                    first_two = ' '.join(words[i:i+2])
-                    last_two = ' '.join(words[i+2:i+4])
-                    if len(first_two) <= 20 and len(last_two) <= 20:
-                        chunks.append(words[i:i+2])
-                        chunks.append(words[i+2:i+4])
-                    else:
-                        # Fall back to smaller chunks
-                        chunks.append([words[i]])
-                        i += 1
-                        continue
-                break
-            else:
-                # More than 4 words - take what fits in 20 chars
-                current_chunk = []
-                current_text = ""
-                
-                for j in range(i, min(i + 4, len(words))):  # Max 4 words per chunk
-                    test_text = current_text + (' ' if current_text else '') + words[j]
-                    if len(test_text) <= 20:
-                        current_chunk.append(words[j])
-                        current_text = test_text
-                    else:
-                        break
-                
-                if not current_chunk:  # Single word is too long
-                    current_chunk = [words[i]]
-                
-                chunks.append(current_chunk)
-                i += len(current_chunk)
-        
-        return chunks
+        return self._chunk(words, get_text=lambda w: w)
     
     def _clean_title_text(self, text: str) -> str:
         """Clean title text by removing emojis, special characters, and non-English text"""
-        import re
-        
-        # Remove emojis and other Unicode symbols
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002500-\U00002BEF"  # chinese char
-            "\U00002702-\U000027B0"
-            "\U00002702-\U000027B0"
-            "\U000024C2-\U0001F251"
-            "\U0001f926-\U0001f937"
-            "\U00010000-\U0010ffff"
-            "\u2640-\u2642" 
-            "\u2600-\u2B55"
-            "\u200d"
-            "\u23cf"
-            "\u23e9"
-            "\u231a"
-            "\ufe0f"  # dingbats
-            "\u3030"
-            "]+", 
-            flags=re.UNICODE
-        )
-        
-        # Remove emojis
-        text = emoji_pattern.sub('', text)
-        
-        # Keep only ASCII letters, numbers, spaces, and basic punctuation
-        text = re.sub(r'[^\w\s\-.,!?()\'"]', '', text)
-        
-        # Clean up multiple spaces and trim
-        text = ' '.join(text.split())
-        
-        return text.strip()
+        return _clean_title(text)
     
-    def _split_title_text(self, text: str, font_size: int = None, video_width: int = 1080) -> List[str]:
+    def _split_title_text(self, text: str, font_size: int = None, video_width: int = 1080,
+                          font_file: str = None) -> List[str]:
         """Split title text into multiple lines based on font size and video width
         
         Args:
             text: The text to split
             font_size: Font size in pixels (if None, will estimate based on config)
             video_width: Video width in pixels for calculating line capacity
+            font_file: Font used to draw the title; if Pillow can load it, lines are
+                fitted to the measured text width instead of an estimated character count
         """
         # Estimate font size if not provided
         if font_size is None:
-            title_config = self.config.get('title_style', {})
+            title_config = self._title_cfg
             font_size_multiplier = title_config.get('FONT_SIZE_MULTIPLIER', 0.09)
             # Use config video height for calculation, default to 1920
-            video_height = self.config.get('video', {}).get('VIDEO_HEIGHT', 1920)
+            video_height = self._video_cfg.get('VIDEO_HEIGHT', 1920)
             font_size = int(video_height * font_size_multiplier)
         
         # Get video width from config if not provided
         if video_width == 1080:  # Default value, replace with config
-            video_width = self.config.get('video', {}).get('VIDEO_WIDTH', 1080)
+            video_width = self._video_cfg.get('VIDEO_WIDTH', 1080)
+        
+        if font_file and _load_font(font_file, font_size) is not None:
+            # Same usable width as the estimate below (80% of the video width)
+            return list(_wrap_title_measured(text, font_file, font_size, int(video_width * 0.8)))
         
         # Calculate approximate characters that fit per line
         # For meme fonts (Arial Black/Impact), characters are wider - about 80% of font size
         # For normal fonts, about 60% of font size
-        title_config = self.config.get('title_style', {})
+        title_config = self._title_cfg
         use_meme_style = title_config.get('STYLE', 'normal') == 'meme'
         
         if use_meme_style:
@@ -518,39 +964,7 @@ class FFmpegProcessor:
         # Ensure reasonable bounds (minimum 12, maximum 50)
         max_chars_per_line = max(12, min(50, max_chars_per_line))
         
-        if len(text) <= max_chars_per_line:
-            return [text]
-        
-        words = text.split()
-        lines = []
-        current_line = ""
-        
-        for word in words:
-            # Check if adding this word would exceed the limit
-            test_line = current_line + (" " if current_line else "") + word
-            
-            if len(test_line) <= max_chars_per_line:
-                current_line = test_line
-            else:
-                # Start new line
-                if current_line:
-                    lines.append(current_line)
-                current_line = word
-                
-                # If single word is too long, truncate it
-                if len(current_line) > max_chars_per_line:
-                    current_line = current_line[:max_chars_per_line-3] + "..."
-        
-        # Add the last line
-        if current_line:
-            lines.append(current_line)
-        
-        # Limit to maximum 3 lines
-        if len(lines) > 3:
-            lines = lines[:2]
-            lines.append(lines[1][:max_chars_per_line-3] + "...")
-        
-        return lines
+        return list(_wrap_title(text, max_chars_per_line))
     
     def process_clip(self, input_path: str, clip: Dict[str, Any], 
                     subtitle_data: List[Dict] = None, 
@@ -562,7 +976,10 @@ class FFmpegProcessor:
                     crop_percentage: int = 10,
                     crop_from_sides: bool = True,
                     subtitle_position_y: int = 100,
-                    subtitle_alignment: int = 2) -> Optional[str]:
+                    subtitle_alignment: int = 2,
+                    probe: bool = True,
+                    src_width: int = None,
+                    src_height: int = None) -> Optional[str]:
         """Process video clip with FFmpeg (ultra-fast)
         
         Args:
@@ -572,142 +989,101 @@ class FFmpegProcessor:
             crop_from_sides: If True, crop from left/right sides. If False, crop from top/bottom
             subtitle_position_y: Distance from bottom of video for subtitles (pixels)
             subtitle_alignment: Subtitle alignment (1=left, 2=center, 3=right)
+            probe: Run ffprobe for the source dimensions used to size the title text.
+                If False, the configured output dimensions are used instead.
+            src_width, src_height: Source dimensions, if the caller already has them (see
+                probe_dimensions); skips the probe
         """
         try:
             base, ext = os.path.splitext(input_path)
             output_path = f"{base}_rendered{ext}"
+            # FFmpeg writes here and the result is renamed into place, so a killed render
+            # never leaves a truncated output_path behind
+            partial_path = f"{base}_rendered.part{ext}"
             
-            if os.path.exists(output_path):
+            # Same clip and settings as the existing render: nothing to do
+            job_hash = self.render_job_hash(clip, {
+                'enable_subtitles': enable_subtitles, 'burn_subtitles': burn_subtitles,
+                'background_type': background_type, 'font_file': font_file,
+                'enable_crop': enable_crop, 'crop_percentage': crop_percentage,
+                'crop_from_sides': crop_from_sides, 'subtitle_position_y': subtitle_position_y,
+                'subtitle_alignment': subtitle_alignment,
+            })
+            hash_path = f"{output_path}.hash"
+            if os.path.exists(output_path) and self.is_rendered(output_path, job_hash):
+                try:
+                    _remove_source(input_path)
+                except OSError:
+                    pass
                 return output_path
             
-            # Get video info
-            video_info = self.get_video_info(input_path)
-            if not video_info:
-                raise RuntimeError("Could not get video information")
+            # Cheap sanity check before spawning anything
+            try:
+                if os.path.getsize(input_path) <= 0:
+                    raise RuntimeError("Input video is empty")
+            except OSError:
+                raise RuntimeError(f"Input video not found: {input_path}")
+            
+            # Source dimensions (only needed to size the title text)
+            if not (src_width and src_height):
+                if probe:
+                    dimensions = self.probe_dimensions(input_path)
+                    if not dimensions:
+                        raise RuntimeError("Could not get video dimensions")
+                    src_width, src_height = dimensions
+                else:
+                    # Not probed: size the title for the configured output canvas
+                    src_width = self._video_cfg.get('VIDEO_WIDTH', 1080)
+                    src_height = self._video_cfg.get('VIDEO_HEIGHT', 1920)
             
             # Build FFmpeg command for ultra-fast processing
-            cmd = [
-                self.ffmpeg_path,
-                "-i", input_path,
-                "-y",  # Overwrite output
-            ]
+            input_template, output_template = self._cmd_template
+            cmd = [input_path if arg is _INPUT_PATH else arg for arg in input_template]
             
             # Create filter complex for layout with background and text overlays
             filters = []
             
             # Get video config values
-            video_config = self.config.get('video', {})
+            video_config = self._video_cfg
             video_width = video_config.get('VIDEO_WIDTH', 1080)
             video_height = video_config.get('VIDEO_HEIGHT', 1920)
-            main_video_y = video_config.get('MAIN_VIDEO_Y_POSITION', 400)
             blur_sigma_1 = video_config.get('BLUR_SIGMA_1', 10)
             blur_sigma_2 = video_config.get('BLUR_SIGMA_2', 15)
             bg_brightness = video_config.get('BACKGROUND_BRIGHTNESS', -0.1)
-            gradient_color = video_config.get('GRADIENT_COLOR', '0x1a1a2e')
-            solid_color = video_config.get('SOLID_BACKGROUND_COLOR', '#1a1a2e')
+            max_duration = self._encoding_cfg.get('MAX_DURATION_SECONDS', 59)
             
-            if background_type == "blurred":
-                # Create high-quality blurred background (most popular for TikTok/Shorts)
-                filters.append(f"[0:v]scale={video_width}:{video_height}:force_original_aspect_ratio=increase[bg_scaled]")
-                filters.append(f"[bg_scaled]crop={video_width}:{video_height}[bg_cropped]") 
-                # Higher quality blur (2-pass with different sigma values for better aesthetics)
-                filters.append(f"[bg_cropped]gblur=sigma={blur_sigma_1}[temp_blur]")
-                filters.append(f"[temp_blur]gblur=sigma={blur_sigma_2}[temp_blurred]")
-                # Slightly darken the blurred background to make main video stand out better
-                filters.append(f"[temp_blurred]eq=brightness={bg_brightness}[bg_blurred]")
-                
-                # Scale and optionally crop main video
-                if enable_crop and crop_percentage > 0:
-                    if crop_from_sides:
-                        # Crop from left and right sides, then scale to make video larger
-                        # Calculate crop amounts as percentage of original width
-                        crop_left_right = f"(iw*{crop_percentage}/100)"
-                        # Crop the sides first: crop=width:height:x:y
-                        filters.append(f"[0:v]crop=iw-2*{crop_left_right}:ih:{crop_left_right}:0[main_cropped]")
-                        # Now scale the cropped video to fit the target width (making it larger)
-                        filters.append(f"[main_cropped]scale={video_width}:-1[main_scaled]")
-                    else:
-                        # Crop from top and bottom sides, then scale to make video larger
-                        crop_top_bottom = f"(ih*{crop_percentage}/100)"
-                        # Crop the top/bottom first
-                        filters.append(f"[0:v]crop=iw:ih-2*{crop_top_bottom}:0:{crop_top_bottom}[main_cropped]")
-                        # Scale the cropped video to fit target width 
-                        filters.append(f"[main_cropped]scale={video_width}:-1[main_scaled]")
-                else:
-                    # Scale main video to fit width (preserves all content) but use more vertical space
-                    # This ensures no cropping while maximizing size within our layout
-                    filters.append(f"[0:v]scale={video_width}:-1[main_scaled]")
-                
-                # Position video more centered on the page
-                filters.append(f"[bg_blurred][main_scaled]overlay=(W-w)/2:{main_video_y}[composed]")
-                
-            elif background_type == "gradient":
-                # Create animated gradient background (modern look)
-                filters.append(f"color=c={gradient_color}:s={video_width}x{video_height}:d=60[gradient_bg]")
-                
-                # Scale and optionally crop main video
-                if enable_crop and crop_percentage > 0:
-                    if crop_from_sides:
-                        # Crop from left and right sides, then scale to make video larger
-                        crop_left_right = f"(iw*{crop_percentage}/100)"
-                        filters.append(f"[0:v]crop=iw-2*{crop_left_right}:ih:{crop_left_right}:0[main_cropped]")
-                        filters.append(f"[main_cropped]scale={video_width}:-1[main_scaled]")
-                    else:
-                        # Crop from top and bottom sides, then scale to make video larger
-                        crop_top_bottom = f"(ih*{crop_percentage}/100)"
-                        filters.append(f"[0:v]crop=iw:ih-2*{crop_top_bottom}:0:{crop_top_bottom}[main_cropped]")
-                        filters.append(f"[main_cropped]scale={video_width}:-1[main_scaled]")
-                else:
-                    # Scale main video to fit width - preserves all content including webcams
-                    filters.append(f"[0:v]scale={video_width}:-1[main_scaled]")
-                
-                # Position video more centered on the page
-                filters.append(f"[gradient_bg][main_scaled]overlay=(W-w)/2:{main_video_y}[composed]")
-                
-            else:  # solid background
-                # Simple solid color background (fastest)
-                # Scale and optionally crop main video
-                if enable_crop and crop_percentage > 0:
-                    if crop_from_sides:
-                        # Crop from left and right sides, then scale to make video larger
-                        crop_left_right = f"(iw*{crop_percentage}/100)"
-                        filters.append(f"[0:v]crop=iw-2*{crop_left_right}:ih:{crop_left_right}:0[main_cropped]")
-                        filters.append(f"[main_cropped]scale={video_width}:-1[main_scaled]")
-                    else:
-                        # Crop from top and bottom sides, then scale to make video larger
-                        crop_top_bottom = f"(ih*{crop_percentage}/100)"
-                        filters.append(f"[0:v]crop=iw:ih-2*{crop_top_bottom}:0:{crop_top_bottom}[main_cropped]")
-                        filters.append(f"[main_cropped]scale={video_width}:-1[main_scaled]")
-                    filters.append(f"[main_scaled]pad={video_width}:{video_height}:(ow-iw)/2:{main_video_y}:color={solid_color}[composed]")
-                else:
-                    # Scale main video to fit width - preserves all content
-                    filters.append(f"[0:v]scale={video_width}:-1[main_scaled]")
-                    filters.append(f"[main_scaled]pad={video_width}:{video_height}:(ow-iw)/2:{main_video_y}:color={solid_color}[composed]")
+            # Optional cache of rendered blurred backgrounds, reused when the same source is rendered again
+            bg_cache_path = None
+            bg_store_path = None
+            if background_type == "blurred" and video_config.get('CACHE_BACKGROUND', False):
+                bg_cache_path = self._background_cache_path(input_path, video_width, video_height,
+                                                            blur_sigma_1, blur_sigma_2, bg_brightness)
+            bg_cached = bool(bg_cache_path) and os.path.exists(bg_cache_path)
+            
+            # Background, main video and composite, up to the composed frame [c]
+            store_background = bool(bg_cache_path) and not bg_cached
+            if bg_cached:
+                # Reuse the cached background as a second input
+                cmd[3:3] = ["-i", bg_cache_path]
+                try:
+                    os.utime(bg_cache_path)  # Mark as recently used for eviction
+                except OSError:
+                    pass
+            elif store_background:
+                # Also write the background out so the next render of this source can reuse it
+                bg_store_path = f"{bg_cache_path}.part.mp4"
+            filters.extend(self._layout_filters(background_type, bool(enable_crop and crop_percentage > 0),
+                                                crop_percentage, crop_from_sides, bg_cached, store_background))
             
             # Get title text first
             title_text = self._clean_title_text(clip['title'])
             
             # Check if meme style is enabled
-            title_config = self.config.get('title_style', {})
+            title_config = self._title_cfg
             use_meme_style = title_config.get('STYLE', 'normal') == 'meme'
             
-            # Get video dimensions from ffprobe output (needed for both styles)
-            video_width = None
-            video_height = None
-            
-            # Extract dimensions from video streams
-            if 'streams' in video_info:
-                for stream in video_info['streams']:
-                    if stream.get('codec_type') == 'video':
-                        video_width = stream.get('width')
-                        video_height = stream.get('height')
-                        break
-            
-            # Fallback to default dimensions if not found
-            if not video_width or not video_height:
-                video_width = 1080
-                video_height = 1920
-                print_error(f"Could not get video dimensions, using defaults: {video_width}x{video_height}")
+            # Title sizing works from the source dimensions (needed for both styles)
+            video_width, video_height = src_width, src_height
             
             # Calculate font size for line splitting
             if use_meme_style:
@@ -717,141 +1093,198 @@ class FFmpegProcessor:
                 font_size = 60  # Default font size for normal style
             
             # Now split title text based on actual font size and video width
-            title_lines = self._split_title_text(title_text, font_size=font_size, video_width=video_width)
+            title_font = self._find_meme_font() if use_meme_style else font_file
+            title_lines = self._split_title_text(title_text, font_size=font_size, video_width=video_width,
+                                                 font_file=title_font)
             
             # Prepare font file path for FFmpeg (needed for both styles)
-            font_file_escaped = font_file.replace("\\", "/").replace(":", "\\:")
+            font_file_escaped = _escape_filter_path(font_file)
+            
+            # Get title positioning config, resolved once for all lines
+            title_pos_config = self._title_pos_cfg
+            default_font_size = title_pos_config.get('DEFAULT_FONT_SIZE', 60)
+            if len(title_lines) == 1:
+                y_start = title_pos_config.get('SINGLE_LINE_Y', 200)
+                y_spacing = 0
+            elif len(title_lines) == 2:
+                y_start = title_pos_config.get('TWO_LINE_Y_START', 170)
+                y_spacing = title_pos_config.get('TWO_LINE_Y_SPACING', 70)
+            else:
+                # Three lines
+                y_start = title_pos_config.get('THREE_LINE_Y_START', 140)
+                y_spacing = title_pos_config.get('THREE_LINE_Y_SPACING', 60)
             
-            current_filter = "[composed]"
-            for i, line in enumerate(title_lines):
-                next_filter = f"[titled_{i}]" if i < len(title_lines) - 1 else "[titled]"
+            # Styling shared by every normal-style title line, centred horizontally
+            title_style = f"fontfile='{font_file_escaped}':fontsize={default_font_size}:fontcolor=white:shadowcolor=black:shadowx=2:shadowy=2:x=(w-text_w)/2"
+            
+            # Every text overlay (title, channel name, watermark, subtitles) is one in-place filter
+            # chain joined with ',' on the composed frame, rather than separate labelled nodes
+            text_chain = []
+            
+            # Multi-line titles are drawn by a single drawtext reading the lines from a file, so the
+            # font is loaded once. Per-line centring needs text_align (FFmpeg 6.1+); older builds
+            # get one drawtext per line
+            title_file = None
+            if len(title_lines) > 1 and 'text_align' in _drawtext_options(self.ffmpeg_path):
+                title_file = os.path.join(self.temp_dir, f"title_{os.getpid()}_{uuid.uuid4().hex}.txt")
+                with open(title_file, 'w', encoding='utf-8') as f:
+                    f.write("\n".join(title_lines))
+                title_file_escaped = _escape_filter_path(title_file)
                 
                 if use_meme_style:
-                    # Use meme-style formatting
-                    meme_filter = self._create_meme_title_filter(line, video_width, video_height, i, len(title_lines))
-                    filters.append(f"{current_filter}drawtext={meme_filter}{next_filter}")
+                    meme_filter = self._create_meme_title_filter(title_text, video_width, video_height, 0, len(title_lines),
+                                                                 text_file=title_file_escaped)
+                    text_chain.append(f"drawtext={meme_filter}")
                 else:
-                    # Use original formatting with safe margins
-                    line_escaped = line.replace("\\", "\\\\").replace("'", "'\\''").replace(":", "\\:").replace("%", "\\%")
-                    
-                    # Calculate horizontal margins (configurable, default 10% of video width on each side)
-                    margin_percent = title_config.get('MARGIN_PERCENT', 0.10)
-                    side_margin = int(video_width * margin_percent)
-                    
-                    # Get title positioning config
-                    title_pos_config = self.config.get('title_positioning', {})
-                    default_font_size = title_pos_config.get('DEFAULT_FONT_SIZE', 60)
-                    
-                    # Calculate Y position for each line using config values
-                    if len(title_lines) == 1:
-                        y_pos = title_pos_config.get('SINGLE_LINE_Y', 200)
-                    elif len(title_lines) == 2:
-                        y_start = title_pos_config.get('TWO_LINE_Y_START', 170)
-                        y_spacing = title_pos_config.get('TWO_LINE_Y_SPACING', 70)
-                        y_pos = y_start + (i * y_spacing)
+                    # line_spacing is added to the font's line height, so subtract it to keep the configured spacing
+                    text_chain.append(f"drawtext=textfile='{title_file_escaped}':expansion=none:text_align=C:line_spacing={y_spacing - default_font_size}:{title_style}:y={y_start}")
+            else:
+                for i, line in enumerate(title_lines):
+                    if use_meme_style:
+                        # Use meme-style formatting
+                        meme_filter = self._create_meme_title_filter(line, video_width, video_height, i, len(title_lines))
+                        text_chain.append(f"drawtext={meme_filter}")
                     else:
-                        # Three lines
-                        y_start = title_pos_config.get('THREE_LINE_Y_START', 140)
-                        y_spacing = title_pos_config.get('THREE_LINE_Y_SPACING', 60)
-                        y_pos = y_start + (i * y_spacing)
-                    
-                    # Center text horizontally with safe margins
-                    # Simple centering approach that works reliably
-                    x_pos = "(w-text_w)/2"
-                    filters.append(f"{current_filter}drawtext=text='{line_escaped}':fontfile='{font_file_escaped}':fontsize={default_font_size}:fontcolor=white:shadowcolor=black:shadowx=2:shadowy=2:x={x_pos}:y={y_pos}{next_filter}")
+                        # Use original formatting, one line every y_spacing pixels
+                        text_chain.append(f"drawtext=text='{_escape_drawtext(line)}':{title_style}:y={y_start + i * y_spacing}")
                 
-                current_filter = f"[titled_{i}]"
-            
             # Add channel name - positioned below the video with safe margins
             channel_text = f"twitch.tv/{clip['broadcaster_name']}"
             # Escape special characters for FFmpeg drawtext filter
-            channel_text = channel_text.replace("\\", "\\\\").replace("'", "'\\''").replace(":", "\\:").replace("%", "\\%")
+            channel_text = _escape_drawtext(channel_text)
             
             # Center channel name horizontally 
             # Simple centering approach that works reliably
             channel_x_pos = "(w-text_w)/2"
             
             # Get channel name config
-            title_pos_config = self.config.get('title_positioning', {})
             channel_y_offset = title_pos_config.get('CHANNEL_NAME_Y_OFFSET', 150)
             channel_font_size = title_pos_config.get('CHANNEL_NAME_FONT_SIZE', 36)
             
-            filters.append(f"[titled]drawtext=text='{channel_text}':fontfile='{font_file_escaped}':fontsize={channel_font_size}:fontcolor=white:shadowcolor=black:shadowx=2:shadowy=2:x={channel_x_pos}:y=h-{channel_y_offset}[channel_added]")
+            text_chain.append(f"drawtext=text='{channel_text}':fontfile='{font_file_escaped}':fontsize={channel_font_size}:fontcolor=white:shadowcolor=black:shadowx=2:shadowy=2:x={channel_x_pos}:y=h-{channel_y_offset}")
             
             # Add watermark if enabled
-            watermark_filter = self._create_watermark_filter(video_width, video_height)
+            watermark_filter = self._watermark_filter_str
             if watermark_filter:
-                filters.append(f"[channel_added]drawtext={watermark_filter}[watermarked]")
-                current_output = "[watermarked]"
-            else:
-                current_output = "[channel_added]"
+                text_chain.append(f"drawtext={watermark_filter}")
             
             # Add subtitle overlay if enabled (TikTok-style, positioned below main video)
             if enable_subtitles and burn_subtitles and subtitle_data:
-                subtitle_file = os.path.join(self.temp_dir, f"temp_subtitles_{os.getpid()}.srt")
+                subtitle_file = os.path.join(self.temp_dir, f"temp_subtitles_{os.getpid()}_{uuid.uuid4().hex}.srt")
                 if self.create_subtitle_file(subtitle_data, subtitle_file):
                     # Escape the subtitle file path for Windows
-                    subtitle_file_escaped = subtitle_file.replace("\\", "/").replace(":", "\\:")
+                    subtitle_file_escaped = _escape_filter_path(subtitle_file)
                     
                     # High-quality TikTok-style subtitles with configurable positioning
                     # Use configurable MarginV (distance from bottom) and Alignment
-                    filters.append(f"{current_output}subtitles='{subtitle_file_escaped}':force_style='FontName=Arial,FontSize=12,PrimaryColour=&Hffffff,OutlineColour=&HFB5689,Outline=2,BorderStyle=1,Alignment={subtitle_alignment},MarginV={subtitle_position_y},Bold=1'[final]")
-                    final_output = "[final]"
-                else:
-                    final_output = current_output
-            else:
-                final_output = current_output
+                    text_chain.append(f"subtitles='{subtitle_file_escaped}':force_style='FontName=Arial,FontSize=12,PrimaryColour=&Hffffff,OutlineColour=&HFB5689,Outline=2,BorderStyle=1,Alignment={subtitle_alignment},MarginV={subtitle_position_y},Bold=1'")
+            
+            final_output = "[out]"
+            filters.append(f"[c]{','.join(text_chain)}{final_output}")
             
-            # Combine all filters
+            # Combine all filters. The graph goes to a script file rather than the command line,
+            # where long titles and paths could run into the OS argument length limit
             filter_complex = ";".join(filters)
+            filter_script = os.path.join(self.temp_dir, f"fc_{os.getpid()}_{uuid.uuid4().hex}.txt")
+            with open(filter_script, 'w', encoding='utf-8') as f:
+                f.write(filter_complex)
             
-            cmd.extend([
-                "-filter_complex", filter_complex,
+            graph_args = [
+                "-filter_complex_script", filter_script,
                 "-map", final_output,
                 "-map", "0:a",  # Copy audio
-            ])
+            ]
             
             # Get encoding settings from config
-            encoding_config = self.config.get('encoding', {})
-            video_codec = encoding_config.get('VIDEO_CODEC', 'libx264')
+            encoding_config = self._encoding_cfg
             preset = encoding_config.get('PRESET', 'medium')
             crf = encoding_config.get('CRF', '18')
-            framerate = encoding_config.get('FRAMERATE', '30')
             profile = encoding_config.get('PROFILE', 'high')
-            tune = encoding_config.get('TUNE', 'film')
-            audio_codec = encoding_config.get('AUDIO_CODEC', 'aac')
-            audio_bitrate = encoding_config.get('AUDIO_BITRATE', '192k')
-            max_duration = encoding_config.get('MAX_DURATION_SECONDS', 59)
+            tune = self._pick_tune(clip)
             timeout = encoding_config.get('PROCESSING_TIMEOUT', 300)
             
-            # Add encoding settings
-            cmd.extend([
-                # High-quality encoding settings
-                "-c:v", video_codec,
-                "-preset", preset,  # Better quality, reasonable speed
-                "-crf", str(crf),  # Higher quality (lower is better, 18-20 is "visually lossless")
-                "-r", str(framerate),  # Higher framerate for smoother motion
-                "-profile:v", profile,  # Use high profile for better quality
-                "-tune", tune,  # Tune for general film content
-                
-                # Better audio settings
-                "-c:a", audio_codec,
-                "-b:a", audio_bitrate,  # Higher audio bitrate
-                
-                # Performance optimizations
-                "-threads", "0",  # Use all CPU threads
-                "-movflags", "+faststart",  # Fast streaming start
-                
-                # Trim to configured duration if needed
-                "-t", str(max_duration),
-                
-                output_path
-            ])
+            # Video encoder settings (a hardware VIDEO_CODEC falls back to libx264 on the CPU)
+            cpu_video_args = _video_encoder_args(self._cpu_codec, preset, crf, profile, tune)
+            encode_args = [partial_path if arg is _OUTPUT_PATH else arg for arg in output_template]
+            
+            if bg_store_path:
+                # Second output: the blurred background only, for the background cache
+                encode_args += [
+                    "-map", "[bc]", "-an",
+                    "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+                    "-t", str(max_duration),
+                    bg_store_path
+                ]
             
             # Run FFmpeg command
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            hw_filter_script = None
+            try:
+                if self.hw_encoder:
+                    # The filter graph stays on the CPU, only the encode moves to the GPU
+                    hw_encoder = self.hw_encoder
+                    hw_input_args = []
+                    hw_graph_args = graph_args
+                    gpu_frames = hw_encoder == 'h264_nvenc' and self.hwaccel == 'cuda'
+                    if gpu_frames:
+                        # Decoded frames stay in GPU memory and are downscaled there with scale_cuda, so only
+                        # the smaller frame is copied back for the CPU-only filters (blur, crop, text).
+                        # With a side crop the frame is kept wide enough that the crop isn't upscaled
+                        scale_width = self._video_cfg.get('VIDEO_WIDTH', 1080)
+                        if enable_crop and crop_percentage > 0 and crop_from_sides:
+                            scale_width = math.ceil(scale_width / (1 - 2 * crop_percentage / 100) / 2) * 2
+                        hw_input_args = ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+                        hw_filter_script = f"{os.path.splitext(filter_script)[0]}_hw.txt"
+                        with open(hw_filter_script, 'w', encoding='utf-8') as f:
+                            f.write(filter_complex.replace(
+                                "[0:v]", f"[0:v]scale_cuda=w={scale_width}:h=-2,hwdownload,format=nv12,", 1))
+                        hw_graph_args = ["-filter_complex_script", hw_filter_script,
+                                         "-map", final_output, "-map", "0:a"]
+                    elif hw_encoder == 'h264_nvenc':
+                        # Decode on the GPU as well; frames are copied back for the CPU filters
+                        hw_input_args = ["-hwaccel", "cuda"]
+                    elif hw_encoder == 'h264_vaapi':
+                        # VAAPI encodes from GPU surfaces, so upload the finished frames
+                        hw_input_args = ["-vaapi_device", self.vaapi_device]
+                        hw_filter_script = f"{os.path.splitext(filter_script)[0]}_hw.txt"
+                        with open(hw_filter_script, 'w', encoding='utf-8') as f:
+                            f.write(f"{filter_complex};{final_output}format=nv12,hwupload[hw]")
+                        hw_graph_args = ["-filter_complex_script", hw_filter_script,
+                                         "-map", "[hw]", "-map", "0:a"]
+                    
+                    hw_video_args = _video_encoder_args(hw_encoder, preset, crf, profile, tune)
+                    hw_cmd = cmd[:1] + hw_input_args + cmd[1:] + hw_graph_args + hw_video_args + encode_args
+                    returncode, stderr_tail = _run_ffmpeg(hw_cmd, timeout)
+                    if returncode != 0 and gpu_frames:
+                        # No NVDEC/scale_cuda in this build or driver: keep NVENC, decode as before
+                        print_error("CUDA decoding failed, copying decoded frames to the CPU instead")
+                        self._fall_back('hwaccel', 'none')
+                        hw_cmd = cmd[:1] + ["-hwaccel", "cuda"] + cmd[1:] + graph_args + hw_video_args + encode_args
+                        returncode, stderr_tail = _run_ffmpeg(hw_cmd, timeout)
+                    if returncode != 0:
+                        # No usable GPU at runtime, stay on the CPU encoder from now on
+                        print_error(f"{hw_encoder} encoding failed, falling back to CPU encoding")
+                        self._fall_back('hw_encoder', None)
+                if not self.hw_encoder:
+                    returncode, stderr_tail = _run_ffmpeg(cmd + graph_args + cpu_video_args + encode_args, timeout)
+            finally:
+                # The filter scripts and title file are only needed while FFmpeg runs
+                for script in (filter_script, hw_filter_script, title_file):
+                    try:
+                        if script:
+                            os.remove(script)
+                    except OSError:
+                        pass
             
-            if result.returncode == 0:
+            if bg_store_path:
+                if returncode == 0 and os.path.exists(bg_store_path):
+                    os.replace(bg_store_path, bg_cache_path)
+                    self._evict_background_cache(os.path.dirname(bg_cache_path))
+                elif os.path.exists(bg_store_path):
+                    os.remove(bg_store_path)
+            
+            if returncode == 0:
+                os.replace(partial_path, output_path)
+                
                 # Clean up temp subtitle file
                 if enable_subtitles and burn_subtitles and subtitle_data:
                     try:
@@ -860,38 +1293,277 @@ class FFmpegProcessor:
                     except:
                         pass
                 
+                try:
+                    with open(hash_path, 'w', encoding='utf-8') as f:
+                        f.write(job_hash)
+                except OSError:
+                    pass
+                
                 # Remove original file
                 try:
-                    if os.path.exists(input_path):
-                        os.remove(input_path)
+                    _remove_source(input_path)
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     print_error(f"Warning: Could not remove original file: {e}")
                 
                 print_success(f"Rendering Completed: {clip['title']}")
                 return output_path
             else:
-                print_error(f"FFmpeg failed: {result.stderr}")
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                print_error(f"FFmpeg failed: {stderr_tail}")
                 return None
                 
         except Exception as e:
             print_error(f"Error in FFmpeg processing: {e}")
             return None
     
+    def _layout_filters(self, background_type: str, crop: bool, crop_percentage: float, crop_from_sides: bool,
+                        bg_cached: bool, store_background: bool) -> Tuple[str, ...]:
+        """Filter graph from the source to the composed frame [c]: background, scaled main video, composite
+        
+        The chains use iw/ih expressions rather than the source size, so the graph only depends on
+        these options and the config, and is built once per distinct combination.
+        
+        Args:
+            background_type: "blurred", "gradient" or "solid"
+            crop, crop_percentage, crop_from_sides: Main video crop
+            bg_cached: The blurred background is read from a cache file as input 1
+            store_background: Also output the blurred background as [bc] for the cache
+        """
+        key = (background_type, crop, crop_percentage, crop_from_sides, bg_cached, store_background)
+        filters = self._layout_cache.get(key)
+        if filters is not None:
+            return filters
+        
+        video_config = self._video_cfg
+        video_width = video_config.get('VIDEO_WIDTH', 1080)
+        video_height = video_config.get('VIDEO_HEIGHT', 1920)
+        main_video_y = video_config.get('MAIN_VIDEO_Y_POSITION', 400)
+        gradient_color = video_config.get('GRADIENT_COLOR', '0x1a1a2e')
+        solid_color = video_config.get('SOLID_BACKGROUND_COLOR', '#1a1a2e')
+        framerate = self._encoding_cfg.get('FRAMERATE', '30')
+        max_duration = self._encoding_cfg.get('MAX_DURATION_SECONDS', 59)
+        
+        # Convert to the output framerate before anything else, so no filter processes
+        # frames that would be dropped at the end (or duplicated for a misdetected input rate)
+        source_fps = f"fps={framerate}"
+        filters = []
+        
+        # Scale and optionally crop main video (shared by every background type)
+        main_chain = []
+        if crop:
+            if crop_from_sides:
+                # Crop from left and right sides, then scale to make video larger
+                # Calculate crop amounts as percentage of original width
+                crop_left_right = f"(iw*{crop_percentage}/100)"
+                # Crop the sides first: crop=width:height:x:y
+                main_chain.append(f"crop=iw-2*{crop_left_right}:ih:{crop_left_right}:0")
+            else:
+                # Crop from top and bottom sides, then scale to make video larger
+                crop_top_bottom = f"(ih*{crop_percentage}/100)"
+                main_chain.append(f"crop=iw:ih-2*{crop_top_bottom}:0:{crop_top_bottom}")
+        # Scale main video to fit width (preserves all content, including webcams)
+        main_chain.append(f"scale={video_width}:-1")
+        main_chain = ",".join(main_chain)
+        
+        # Both backgrounds are opaque, so xstack can copy the main video into place instead of
+        # blending it with the single-threaded overlay filter. The main video always spans the
+        # full width (x offset 0); the crop keeps the canvas size if it runs past the bottom.
+        # The two inputs overlap, and xstack gives each input its own slice job, so threads=1
+        # keeps the copies in input order (background, then video) instead of racing them.
+        # shortest=1 ends the output with the clip rather than a longer generated background
+        if video_config.get('USE_XSTACK', True):
+            composite = (f"xstack=inputs=2:layout=0_0|0_{main_video_y}:shortest=1:threads=1,"
+                         f"crop={video_width}:{video_height}:0:0")
+        else:
+            composite = f"overlay=(W-w)/2:{main_video_y}:shortest=1"
+        
+        # The background and the main video are independent sibling branches that only
+        # meet at the overlay, so FFmpeg can run them on separate filter threads.
+        # Stream labels are kept short since the graph is parsed for every render:
+        # [bs]/[ms] split source, [bg] background, [bc] background for the cache,
+        # [v] scaled main video, [c] composed frame, [out] final frame
+        if background_type == "blurred":
+            if bg_cached:
+                filters.append("[1:v]setpts=PTS-STARTPTS[bg]")
+                filters.append(f"[0:v]{source_fps},{main_chain}[v]")
+            else:
+                # Decode once and feed both branches
+                filters.append(f"[0:v]{source_fps},split=2[bs][ms]")
+                # Create high-quality blurred background (most popular for TikTok/Shorts)
+                bg_chain = f"[bs]{self._bg_blur_filter_str}"
+                if store_background:
+                    filters.append(f"{bg_chain},split=2[bg][bc]")
+                else:
+                    filters.append(f"{bg_chain}[bg]")
+                filters.append(f"[ms]{main_chain}[v]")
+            
+            # Position video more centered on the page
+            filters.append(f"[bg][v]{composite}[c]")
+            
+        elif background_type == "gradient":
+            # Flat colour background, generated at the output rate and only for as long as the
+            # clip can run, so no frames are produced only to be dropped by the encoder
+            filters.append(f"color=c={gradient_color}:s={video_width}x{video_height}:r={framerate}:d={max_duration}[bg]")
+            filters.append(f"[0:v]{source_fps},{main_chain}[v]")
+            
+            # Position video more centered on the page
+            filters.append(f"[bg][v]{composite}[c]")
+            
+        else:  # solid background
+            # Simple solid color background (fastest)
+            filters.append(f"[0:v]{source_fps},{main_chain},pad={video_width}:{video_height}:(ow-iw)/2:{main_video_y}:color={solid_color}[c]")
+        
+        filters = tuple(filters)
+        self._layout_cache[key] = filters
+        return filters
+    
+    def render_job_hash(self, clip: Dict[str, Any], options: Dict[str, Any]) -> str:
+        """Hash of everything that decides a render's output, stored next to it as <output>.hash
+        
+        Only the clip fields that reach the frame or the encoder settings are used, so a
+        re-fetched clip with a new view count still matches. The source file isn't part of it,
+        since it's removed after rendering and the hash is checked before it is downloaded again.
+        
+        Args:
+            clip: Clip the render is for
+            options: The process_clip options other than input_path, clip and subtitle_data
+        """
+        job = {
+            'clip': {key: clip.get(key) for key in ('id', 'title', 'broadcaster_name', 'game_id')},
+            'options': options,
+            'cfg': {key: self.config.get(key) for key in (
+                'video', 'encoding', 'title_style', 'title_positioning', 'fonts', 'watermark', 'subtitles')},
+        }
+        payload = json.dumps(job, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+    
+    def is_rendered(self, output_path: str, job_hash: str) -> bool:
+        """Whether output_path was rendered with the settings job_hash stands for"""
+        try:
+            with open(f"{output_path}.hash", 'r', encoding='utf-8') as f:
+                return f.read().strip() == job_hash
+        except OSError:
+            return False
+    
+    def _pick_tune(self, clip: Dict[str, Any]) -> str:
+        """x264 -tune for a clip: zerolatency on the fast path, animation for listed games, else TUNE"""
+        encoding_config = self._encoding_cfg
+        if encoding_config.get('FAST_PATH', False):
+            # No B-frames or lookahead: fastest encode, larger files
+            return 'zerolatency'
+        animation_games = encoding_config.get('ANIMATION_GAME_IDS', [])
+        if animation_games and str(clip.get('game_id', '')) in {str(game) for game in animation_games}:
+            return 'animation'
+        return encoding_config.get('TUNE', 'film')
+    
+    def _background_cache_path(self, input_path: str, video_width: int, video_height: int,
+                               blur_sigma_1: float, blur_sigma_2: float, bg_brightness: float) -> Optional[str]:
+        """Path of the cached blurred background for a source and background settings"""
+        try:
+            st = os.stat(input_path)
+        except OSError:
+            return None
+        
+        video_config = self._video_cfg
+        max_duration = self._encoding_cfg.get('MAX_DURATION_SECONDS', 59)
+        cache_dir = video_config.get('BACKGROUND_CACHE_DIR') or os.path.join(self.temp_dir, 'ttvclips_bg')
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        # Raw clips are deleted after rendering and re-downloaded under the same name,
+        # so the key uses path and size rather than mtime
+        key = (f"{os.path.abspath(input_path)}|{st.st_size}|{video_width}x{video_height}"
+               f"|{blur_sigma_1}|{blur_sigma_2}|{bg_brightness}|{max_duration}")
+        return os.path.join(cache_dir, f"bg_{hashlib.sha1(key.encode()).hexdigest()[:12]}.mp4")
+    
+    def _evict_background_cache(self, cache_dir: str):
+        """Delete least recently used cached backgrounds beyond the configured size"""
+        max_bytes = self._video_cfg.get('BACKGROUND_CACHE_MAX_MB', 2048) * 1024 * 1024
+        try:
+            entries = [entry for entry in os.scandir(cache_dir)
+                       if entry.name.startswith('bg_') and entry.name.endswith('.mp4') and '.part' not in entry.name]
+            entries = sorted(((entry.stat(), entry.path) for entry in entries), key=lambda item: item[0].st_mtime)
+        except OSError:
+            return
+        
+        total = sum(st.st_size for st, _ in entries)
+        for st, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= st.st_size
+            except OSError:
+                pass
+    
+    def _fall_back(self, name: str, value: Any):
+        """Set an encoder setting after a failed render, here and on the processor this was split
+        from, so later splits (e.g. the next daemon run) don't repeat the failure"""
+        processor = self
+        while processor is not None:
+            setattr(processor, name, value)
+            processor = processor._parent
+    
+    def split_for_parallel(self, parallelism: int = None) -> Tuple[int, 'FFmpegProcessor']:
+        """Number of renders to run at once, and a processor copy whose FFmpeg threads share the cores
+        
+        Args:
+            parallelism: Requested concurrent renders (default: encoding.PARALLEL_JOBS)
+            
+        Returns:
+            (workers, processor) to render with
+        """
+        cpu_count = os.cpu_count() or 1
+        workers = parallelism or self._encoding_cfg.get('PARALLEL_JOBS', 2)
+        if self.hw_encoder == 'h264_nvenc':
+            # Consumer NVIDIA cards only allow a couple of concurrent NVENC sessions
+            workers = min(workers, 2)
+        workers = max(1, workers)
+        
+        # Split the cores between jobs instead of letting every FFmpeg grab all of them
+        worker = copy.copy(self)
+        worker._parent = self
+        worker.threads = max(1, cpu_count // workers)
+        worker._cmd_template = worker._build_template()
+        return workers, worker
+    
+    def process_clips_batch(self, jobs: List[Tuple[str, Dict[str, Any], Optional[List[Dict]]]],
+                            parallelism: int = None, **kwargs) -> List[Optional[str]]:
+        """Render several clips at once, each in its own FFmpeg worker process
+        
+        Args:
+            jobs: (input_path, clip, subtitle_data) tuples
+            parallelism: Number of concurrent renders (default: encoding.PARALLEL_JOBS)
+            **kwargs: Options passed to process_clip for every job
+            
+        Returns:
+            List of rendered file paths in the same order as jobs (None for failures)
+        """
+        if not jobs:
+            return []
+        
+        workers, worker = self.split_for_parallel(parallelism)
+        tasks = [(worker, input_path, clip, subtitle_data, kwargs) for input_path, clip, subtitle_data in jobs]
+        return list(_render_pool(workers).map(_process_clip_job, tasks))
+    
     def extract_audio_ffmpeg(self, video_path: str, audio_path: str) -> bool:
         """Extract audio using FFmpeg (faster than MoviePy)"""
         try:
             # Get audio processing config
-            audio_config = self.config.get('audio_processing', {})
+            audio_config = self._audio_cfg
             sample_rate = audio_config.get('SAMPLE_RATE', '16000')
             audio_codec = audio_config.get('AUDIO_CODEC', 'pcm_s16le')
             channels = audio_config.get('CHANNELS', '1')
             
             # Get encoding config for timeout
-            encoding_config = self.config.get('encoding', {})
+            encoding_config = self._encoding_cfg
             timeout = encoding_config.get('AUDIO_EXTRACTION_TIMEOUT', 60)
             
             cmd = [
                 self.ffmpeg_path,
+                *FFMPEG_QUIET_ARGS,
                 "-i", video_path,
                 "-vn",  # No video
                 "-acodec", audio_codec,  # WAV format for Whisper
@@ -901,26 +1573,47 @@ class FFmpegProcessor:
                 audio_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
             return result.returncode == 0
             
         except Exception as e:
             print_error(f"FFmpeg audio extraction failed: {e}")
             return False
     
+    def extract_audio_pipe(self, video_path: str) -> subprocess.Popen:
+        """Start FFmpeg decoding a video's audio to raw PCM on its stdout
+        
+        The audio is always 16 kHz mono 32-bit float little-endian, the sample format
+        Whisper works in, so no temp file is written and the samples need no conversion.
+        The caller reads process.stdout (e.g. with communicate()) and checks the return code.
+        """
+        cmd = [
+            self.ffmpeg_path,
+            *FFMPEG_QUIET_ARGS,
+            "-i", video_path,
+            "-vn",  # No video
+            "-f", "f32le",  # Raw PCM, no container
+            "-acodec", "pcm_f32le",
+            "-ar", "16000",
+            "-ac", "1",
+            "pipe:1"
+        ]
+        return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, bufsize=1 << 20)
+    
     def get_duration(self, video_path: str) -> float:
-        """Get video duration using FFmpeg"""
+        """Get video duration using FFmpeg (cached while the file is unchanged)"""
         try:
-            cmd = [
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "csv=p=0", video_path
-            ]
+            try:
+                st = os.stat(video_path)
+            except OSError:
+                # Can't key the cache, probe directly
+                return _run_duration_probe(video_path)
+            return _duration_cached(video_path, st.st_size, st.st_mtime_ns)
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                return float(result.stdout.strip())
+        except subprocess.CalledProcessError:
+            # ffprobe ran but couldn't read the file
             return 0.0
-            
         except Exception as e:
             print_error(f"Error getting duration: {e}")
             return 0.0
\ No newline at end of file
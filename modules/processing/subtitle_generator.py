@@ -2,64 +2,248 @@
 Subtitle generation module using faster-whisper for Twitch clip processing
 Optimized for Intel N100 CPU and 16GB RAM
 """
+import asyncio
+import math
 import os
+import shutil
 import subprocess
 import tempfile
 import json
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import re
+from functools import lru_cache
 
 try:
     from faster_whisper import WhisperModel
 except ImportError:
     WhisperModel = None
 
+try:
+    # faster-whisper's inference engine, here only to count CUDA devices
+    import ctranslate2
+except ImportError:
+    ctranslate2 = None
+
+try:
+    # Batched transcription of VAD chunks (faster-whisper 1.1+)
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+try:
+    # Optional whisper.cpp backend for 4-bit quantized models (WHISPER_QUANT "int4")
+    from pywhispercpp.model import Model as WhisperCppModel
+except ImportError:
+    WhisperCppModel = None
+
+try:
+    import pysubs2
+except ImportError:
+    pysubs2 = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # Optional JIT for the SRT word grouping
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = ImageDraw = ImageFont = None
+
 from modules.utils.logger import print_header, print_error, print_success
+from modules.processing.ffmpeg_processor import _escape_filter_path, _format_srt_timestamp
+
+# Most cues burned with pre-rendered images (one FFmpeg input each); longer files use libass
+MAX_PRERENDERED_CUES = 100
+
+# libass lays SRT subtitles out on a 288 pixel high script, scaled to the video
+_LIBASS_PLAY_RES_Y = 288
+
+_SRT_CUE_RE = re.compile(
+    r"(\d+):(\d+):(\d+)[,.](\d+)\s*-->\s*(\d+):(\d+):(\d+)[,.](\d+)[^\n]*\n(.*?)(?:\n\s*\n|\Z)", re.S)
+
+def _read_srt_cues(srt_path: str) -> List[Tuple[float, float, str]]:
+    """(start, end, text) for every cue in an SRT file"""
+    with open(srt_path, 'r', encoding='utf-8-sig') as f:
+        content = f.read().replace('\r\n', '\n')
+    cues = []
+    for match in _SRT_CUE_RE.finditer(content):
+        h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(value) for value in match.groups()[:8])
+        text = match.group(9).strip()
+        if text:
+            cues.append((h1 * 3600 + m1 * 60 + s1 + ms1 / 1000, h2 * 3600 + m2 * 60 + s2 + ms2 / 1000, text))
+    return cues
+
+@lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    """Whether faster-whisper can run on a CUDA GPU (checked once per process)"""
+    try:
+        return ctranslate2 is not None and ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+# Loaded Whisper models shared by every SubtitleGenerator, keyed by
+# (backend, model, device, compute_type, cpu_threads)
+_MODEL_CACHE: Dict[Tuple[str, str, str, str, int], object] = {}
+
+# ASS colours are BGR: colour name -> BGR hex for force_style
+_COLOR_BGR = {
+    'white': 'FFFFFF',
+    'black': '000000',
+    'red': '0000FF',
+    'green': '00FF00',
+    'blue': 'FF0000',
+    'yellow': '00FFFF',
+    'cyan': 'FFFF00',
+    'magenta': 'FF00FF'
+}
+
+_FORCE_STYLE_TEMPLATE = ("FontSize={font_size},PrimaryColour=&H{primary},OutlineColour=&H{outline},"
+                         "Outline={outline_width},Alignment=2")
+
+@lru_cache(maxsize=64)
+def _subtitle_force_style(font_size: int, font_color: str, outline_color: str,
+                          outline_width: int, font_file: Optional[str]) -> str:
+    """force_style value for the subtitles filter, built once per style"""
+    style = _FORCE_STYLE_TEMPLATE.format_map({
+        'font_size': font_size,
+        'primary': _COLOR_BGR.get(font_color.lower(), 'FFFFFF'),
+        'outline': _COLOR_BGR.get(outline_color.lower(), 'FFFFFF'),
+        'outline_width': outline_width,
+    })
+    if font_file and os.path.exists(font_file):
+        style = f"FontName={Path(font_file).stem},FontFile={_escape_filter_path(font_file)},{style}"
+    return style
+
+def _group_boundaries(starts, ends, lengths, max_chars, max_gap, boundaries):
+    """
+    Fill boundaries with the index where each SRT word group starts, plus len(lengths) at
+    the end, and return how many were written. A group ends at a pause longer than max_gap
+    or when the next word would take the line ("a b c": word lengths plus spaces) past max_chars.
+    """
+    count = 1
+    boundaries[0] = 0
+    line_length = lengths[0]
+    for i in range(1, len(lengths)):
+        if starts[i] - ends[i - 1] > max_gap or line_length + 1 + lengths[i] > max_chars:
+            boundaries[count] = i
+            count += 1
+            line_length = lengths[i]
+        else:
+            line_length += 1 + lengths[i]
+    boundaries[count] = len(lengths)
+    return count + 1
+
+# Compiled to machine code with Numba when installed (cached on disk between runs)
+_group_boundaries_jit = njit(cache=True)(_group_boundaries) if njit is not None and np is not None else None
+
+def _pcm_f32_to_array(pcm: bytes):
+    """f32le PCM bytes as the float32 sample array faster-whisper takes directly (no copy)"""
+    return np.frombuffer(pcm, dtype=np.float32)
 
 class SubtitleGenerator:
     """
     Handles audio extraction, transcription, and subtitle generation for video clips
     """
     
-    def __init__(self, model_size: str = "base", device: str = "cpu", compute_type: str = "int8", config: dict = None):
+    def __init__(self, model_size: str = "base", device: str = "cpu", compute_type: str = None, config: dict = None):
         """
         Initialize the subtitle generator
         
         Args:
             model_size: Whisper model size ("tiny", "base", "small", "medium", "large")
-            device: Device to run on ("cpu" or "cuda")
-            compute_type: Quantization type ("int8", "int16", "float16", "float32")
+            device: Device to run on ("cpu", "cuda" or "auto" for CUDA when a GPU is available)
+            compute_type: Quantization type ("int8", "int8_float16", "float16", "float32", "int4"),
+                default audio_processing.WHISPER_QUANT ("int8", which becomes "float16" on CUDA)
             config: Configuration dictionary for subtitle styling
         """
         self.model_size = model_size
+        if device == 'auto':
+            device = 'cuda' if _cuda_available() else 'cpu'
         self.device = device
-        self.compute_type = compute_type
         self.config = config or {}
+        self.temp_dir = tempfile.gettempdir()
+        audio_config = self.config.get('audio_processing', {})
+        self.compute_type = compute_type or audio_config.get('WHISPER_QUANT', 'int8')
+        if self.device == 'cuda' and self.compute_type == 'int8' and compute_type is None:
+            # int8 is the CPU default; GPUs run float16 faster (int8_float16 saves VRAM)
+            self.compute_type = 'float16'
         self.model = None
+        self.batch_size = 0
+        # Word alignment is a second pass over the audio. "auto" keeps it for burned subtitles, whose
+        # short chunks (FFmpegProcessor.create_subtitle_file) are timed from the words
+        word_timestamps = audio_config.get('WHISPER_WORD_TIMESTAMPS', 'auto')
+        if word_timestamps == 'auto':
+            word_timestamps = bool(self.config.get('subtitles', {}).get('BURN_SUBTITLES', False))
+        self.word_timestamps = bool(word_timestamps)
+        
+        # int4 runs on whisper.cpp with a quantized GGML model; everything else on faster-whisper
+        self.backend = 'faster-whisper'
+        if self.compute_type == 'int4':
+            if WhisperCppModel is not None:
+                self.backend = 'whisper.cpp'
+            else:
+                print_error("WHISPER_QUANT is int4 but pywhispercpp is not installed, using int8 with faster-whisper")
+                self.compute_type = 'int8'
         
-        if WhisperModel is None:
+        if self.backend == 'faster-whisper' and WhisperModel is None:
             raise ImportError("faster-whisper not installed. Run: pip install faster-whisper")
     
     def _initialize_model(self):
         """Lazy load the Whisper model to save memory"""
         if self.model is None:
-            print_header(f"Loading Whisper model: {self.model_size}")
-            try:
-                # Get CPU threads from config
-                audio_config = self.config.get('audio_processing', {}) if self.config else {}
-                cpu_threads = audio_config.get('WHISPER_CPU_THREADS', 4)
-                
-                self.model = WhisperModel(
-                    self.model_size,
-                    device=self.device,
-                    compute_type=self.compute_type,
-                    cpu_threads=cpu_threads  # Configurable CPU threads
-                )
-                print_success("Whisper model loaded successfully")
-            except Exception as e:
-                print_error(f"Failed to load Whisper model: {e}")
-                raise
+            # Get CPU threads from config
+            audio_config = self.config.get('audio_processing', {}) if self.config else {}
+            cpu_threads = audio_config.get('WHISPER_CPU_THREADS', 4)
+            
+            if self.backend == 'whisper.cpp':
+                # A GGML file path, or a whisper.cpp model name it downloads itself
+                model_name = audio_config.get('WHISPER_GGML_MODEL') or f"{self.model_size}-q5_1"
+            else:
+                model_name = self.model_size
+            
+            # Generators created per clip reuse the model instead of reloading it from disk
+            key = (self.backend, model_name, self.device, self.compute_type, cpu_threads)
+            model = _MODEL_CACHE.get(key)
+            if model is None:
+                print_header(f"Loading Whisper model: {self.model_size}")
+                try:
+                    if self.backend == 'whisper.cpp':
+                        model = WhisperCppModel(model_name, n_threads=cpu_threads)
+                    else:
+                        model = WhisperModel(
+                            model_name,
+                            device=self.device,
+                            compute_type=self.compute_type,
+                            cpu_threads=cpu_threads  # Configurable CPU threads
+                        )
+                    _MODEL_CACHE[key] = model
+                    print_success("Whisper model loaded successfully")
+                except Exception as e:
+                    print_error(f"Failed to load Whisper model: {e}")
+                    raise
+            
+            # Batching decodes several VAD chunks of the audio at once; the pipeline is just a
+            # wrapper around the shared model
+            self.batch_size = audio_config.get('WHISPER_BATCH_SIZE', 8)
+            if self.backend == 'faster-whisper' and BatchedInferencePipeline is not None and self.batch_size > 1:
+                model = BatchedInferencePipeline(model=model)
+            else:
+                self.batch_size = 0
+            self.model = model
+    
+    @classmethod
+    def clear_cache(cls):
+        """Unload every cached Whisper model (instances that already hold one keep it)"""
+        _MODEL_CACHE.clear()
     
     def extract_audio(self, video_path: str, audio_path: str = None) -> str:
         """
@@ -72,11 +256,65 @@ class SubtitleGenerator:
         Returns:
             str: Path to extracted audio file
         """
+        cmd, audio_path = self._extract_audio_cmd(video_path, audio_path)
+        
+        try:
+            # Only errors are logged, so stderr stays raw bytes unless the command fails
+            subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE, check=True)
+            print_success(f"Audio extracted to {audio_path}")
+            return audio_path
+        except subprocess.CalledProcessError as e:
+            print_error(f"Audio extraction failed: {e.stderr.decode('utf-8', errors='replace')}")
+            raise
+    
+    async def extract_audio_async(self, video_path: str, audio_path: str = None) -> str:
+        """extract_audio without blocking the event loop"""
+        cmd, audio_path = self._extract_audio_cmd(video_path, audio_path)
+        await self._run_ffmpeg_async(cmd, "Audio extraction failed")
+        print_success(f"Audio extracted to {audio_path}")
+        return audio_path
+    
+    async def _stream_audio_to_numpy(self, video_path: str):
+        """Decode a video's audio to 16 kHz mono float32 samples through a pipe, with no temp file"""
+        print_header(f"Extracting audio from {Path(video_path).name}")
+        cmd = [
+            'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+            '-i', video_path,
+            '-vn',
+            '-f', 'f32le', '-acodec', 'pcm_f32le',  # Whisper's sample format, no conversion
+            '-ar', '16000',  # Whisper's native rate
+            '-ac', '1',
+            'pipe:1'
+        ]
+        proc = await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.DEVNULL,
+                                                    stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE)
+        pcm, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            stderr = stderr.decode('utf-8', errors='replace')
+            print_error(f"Audio extraction failed: {stderr}")
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+        return _pcm_f32_to_array(pcm)
+    
+    async def _run_ffmpeg_async(self, cmd: List[str], error_message: str):
+        """Run an FFmpeg command as an asyncio subprocess; raises CalledProcessError like check=True"""
+        # Only stderr is read, so stdout goes to DEVNULL rather than a pipe nobody drains
+        proc = await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.DEVNULL,
+                                                    stdout=asyncio.subprocess.DEVNULL,
+                                                    stderr=asyncio.subprocess.PIPE)
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            stderr = stderr.decode('utf-8', errors='replace')
+            print_error(f"{error_message}: {stderr}")
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+    
+    def _extract_audio_cmd(self, video_path: str, audio_path: str = None) -> Tuple[List[str], str]:
+        """FFmpeg command for extract_audio, and the audio path it writes"""
         if audio_path is None:
             # Create temporary audio file
-            temp_dir = tempfile.gettempdir()
             video_name = Path(video_path).stem
-            audio_path = os.path.join(temp_dir, f"{video_name}_audio.wav")
+            audio_path = os.path.join(self.temp_dir, f"{video_name}_audio.wav")
         
         print_header(f"Extracting audio from {Path(video_path).name}")
         
@@ -88,7 +326,7 @@ class SubtitleGenerator:
         
         # Extract audio with configurable settings (optimal for Whisper)
         cmd = [
-            'ffmpeg',
+            'ffmpeg', '-nostdin', '-hide_banner', '-nostats', '-loglevel', 'error',
             '-i', video_path,
             '-vn',  # No video
             '-acodec', audio_codec,  # Configurable audio codec
@@ -97,36 +335,36 @@ class SubtitleGenerator:
             '-y',  # Overwrite output
             audio_path
         ]
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            print_success(f"Audio extracted to {audio_path}")
-            return audio_path
-        except subprocess.CalledProcessError as e:
-            print_error(f"Audio extraction failed: {e.stderr}")
-            raise
+        return cmd, audio_path
     
-    def transcribe_audio(self, audio_path: str, language: str = None) -> List[Dict]:
+    def transcribe_audio(self, audio_path: str, language: str = None, beam_size: int = 5) -> List[Dict]:
         """
         Transcribe audio using faster-whisper
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or 16 kHz mono float32 samples
             language: Language code (e.g., 'en', 'es', 'fr') or None for auto-detect
+            beam_size: Decoding beams (faster-whisper only; 1 is greedy decoding)
             
         Returns:
             List[Dict]: Transcription segments with timestamps
         """
         self._initialize_model()
         
+        if self.backend == 'whisper.cpp':
+            return self._transcribe_whispercpp(audio_path, language)
+        
         try:
-            # Transcribe with word-level timestamps for better subtitle timing
+            # Word-level timestamps give tighter subtitle timing when enabled
+            batch_args = {'batch_size': self.batch_size} if self.batch_size else {}
             segments, info = self.model.transcribe(
                 audio_path,
                 language=language,
-                word_timestamps=True,
+                beam_size=beam_size,
+                word_timestamps=self.word_timestamps,
                 vad_filter=True,  # Voice activity detection
-                vad_parameters=dict(min_silence_duration_ms=500)  # Merge short pauses
+                vad_parameters=dict(min_silence_duration_ms=500),  # Merge short pauses
+                **batch_args
             )
             
             transcription = []
@@ -156,9 +394,77 @@ class SubtitleGenerator:
             print_error(f"Transcription failed: {e}")
             raise
     
+    def _transcribe_whispercpp(self, audio, language: str = None) -> List[Dict]:
+        """Transcribe with the whisper.cpp model, in the same segment format as transcribe_audio"""
+        try:
+            params = {'language': language} if language else {}
+            segments = self.model.transcribe(audio, **params)
+            
+            # whisper.cpp times are in centiseconds and come without word timings,
+            # so generate_srt uses its segment-level fallback
+            transcription = [{
+                'start': segment.t0 / 100.0,
+                'end': segment.t1 / 100.0,
+                'text': segment.text.strip(),
+                'words': []
+            } for segment in segments]
+            
+            print_success(f"Transcription completed. {len(transcription)} segments")
+            return transcription
+            
+        except Exception as e:
+            print_error(f"Transcription failed: {e}")
+            raise
+    
+    def transcribe_audio_batch(self, audio_inputs: List, language: str = None,
+                               beam_size: int = 1) -> List[Optional[List[Dict]]]:
+        """
+        Transcribe several clips in one session on the already loaded model
+        
+        Args:
+            audio_inputs: Audio file paths, float32 sample arrays or f32le PCM bytes (None is skipped)
+            language: Language code (e.g., 'en', 'es', 'fr') or None for auto-detect
+            beam_size: Decoding beams for every clip (greedy by default, as short clips gain little from beams)
+            
+        Returns:
+            List of transcriptions in input order (None where the input was None or transcription failed)
+        """
+        try:
+            self._initialize_model()
+        except Exception as e:
+            # No model, no subtitles; the clips still render without them
+            print_error(f"Could not load the Whisper model: {e}")
+            return [None] * len(audio_inputs)
+        
+        transcriptions = []
+        for audio in audio_inputs:
+            try:
+                if isinstance(audio, bytes):
+                    audio = _pcm_f32_to_array(audio)
+                transcriptions.append(None if audio is None else self.transcribe_audio(audio, language, beam_size))
+            except Exception:
+                # transcribe_audio already reported it; the other clips still get subtitles
+                transcriptions.append(None)
+        return transcriptions
+    
+    def transcribe_pcm(self, pcm: bytes, language: str = None) -> List[Dict]:
+        """
+        Transcribe raw audio, e.g. read from FFmpegProcessor.extract_audio_pipe
+        
+        Args:
+            pcm: 16 kHz mono 32-bit float little-endian PCM
+            language: Language code (e.g., 'en', 'es', 'fr') or None for auto-detect
+            
+        Returns:
+            List[Dict]: Transcription segments with timestamps
+        """
+        # Skips faster-whisper's own decode and sample conversion
+        return self.transcribe_audio(_pcm_f32_to_array(pcm), language)
+    
     def generate_srt(self, transcription: List[Dict], srt_path: str, max_chars_per_line: int = 40) -> str:
         """
         Generate SRT subtitle file from transcription with intelligent word-based timing
+        (or ASS/VTT for those extensions when pysubs2 is installed)
         
         Args:
             transcription: List of transcription segments
@@ -170,115 +476,107 @@ class SubtitleGenerator:
         """
         print_header(f"Generating SRT subtitles: {Path(srt_path).name}")
         
-        def format_timestamp(seconds: float) -> str:
-            """Convert seconds to SRT timestamp format"""
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            millis = int((seconds % 1) * 1000)
-            return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-        
         def group_words_by_timing(words: List[Dict], max_chars: int, max_gap: float = 0.5) -> List[Dict]:
             """Group words into subtitle chunks based on timing and character limits"""
-            if not words:
-                return []
-            
-            groups = []
-            current_group = {'words': [], 'text': '', 'start': None, 'end': None}
-            
+            kept = []
             for word in words:
                 word_text = word['word'].strip()
-                if not word_text:
-                    continue
-                
-                # Calculate if adding this word would exceed character limit
-                potential_text = current_group['text'] + (' ' if current_group['text'] else '') + word_text
-                
-                # Check for timing gap (pause between words)
-                has_timing_gap = (current_group['end'] is not None and 
-                                word['start'] - current_group['end'] > max_gap)
-                
-                # Start new group if: too long, or there's a significant pause
-                if (len(potential_text) > max_chars and current_group['words']) or has_timing_gap:
-                    if current_group['words']:
-                        groups.append(current_group)
-                    current_group = {'words': [], 'text': '', 'start': None, 'end': None}
-                
-                # Add word to current group
-                current_group['words'].append(word)
-                current_group['text'] = current_group['text'] + (' ' if current_group['text'] else '') + word_text
-                current_group['start'] = word['start'] if current_group['start'] is None else current_group['start']
-                current_group['end'] = word['end']
+                if word_text:
+                    kept.append((word, word_text))
+            if not kept:
+                return []
             
-            # Add final group
-            if current_group['words']:
-                groups.append(current_group)
+            if _group_boundaries_jit is not None:
+                # Flat arrays for the compiled boundary search
+                count = len(kept)
+                starts = np.fromiter((word['start'] for word, _ in kept), dtype=np.float64, count=count)
+                ends = np.fromiter((word['end'] for word, _ in kept), dtype=np.float64, count=count)
+                lengths = np.fromiter((len(word_text) for _, word_text in kept), dtype=np.int64, count=count)
+                found = np.empty(count + 1, dtype=np.int64)
+                boundaries = found[:_group_boundaries_jit(starts, ends, lengths, max_chars, max_gap, found)].tolist()
+            else:
+                found = [0] * (len(kept) + 1)
+                count = _group_boundaries([word['start'] for word, _ in kept], [word['end'] for word, _ in kept],
+                                          [len(word_text) for _, word_text in kept], max_chars, max_gap, found)
+                boundaries = found[:count]
             
+            groups = []
+            for first, last in zip(boundaries, boundaries[1:]):
+                group_words = kept[first:last]
+                groups.append({
+                    'words': [word for word, _ in group_words],
+                    'text': ' '.join(word_text for _, word_text in group_words),
+                    'start': group_words[0][0]['start'],
+                    'end': group_words[-1][0]['end']
+                })
             return groups
         
         try:
-            with open(srt_path, 'w', encoding='utf-8') as f:
-                subtitle_index = 1
+            # (start, end, text) per cue, written to the file in one go at the end
+            cues = []
+            
+            for segment in transcription:
+                if not segment['text'].strip():
+                    continue
                 
-                for segment in transcription:
-                    if not segment['text'].strip():
-                        continue
+                # Use word-level timing if available
+                if segment.get('words') and len(segment['words']) > 0:
+                    # Group words intelligently based on timing and character limits
+                    word_groups = group_words_by_timing(segment['words'], max_chars_per_line)
                     
-                    # Use word-level timing if available
-                    if segment.get('words') and len(segment['words']) > 0:
-                        # Group words intelligently based on timing and character limits
-                        word_groups = group_words_by_timing(segment['words'], max_chars_per_line)
+                    cues.extend((group['start'], group['end'], group['text']) for group in word_groups)
+                else:
+                    # Fallback to segment-level timing (old method)
+                    def split_text(text: str, max_chars: int) -> List[str]:
+                        """Split text into lines respecting word boundaries"""
+                        words = text.split()
+                        lines = []
+                        current_line = []
+                        current_length = 0
                         
-                        for group in word_groups:
-                            f.write(f"{subtitle_index}\n")
-                            f.write(f"{format_timestamp(group['start'])} --> {format_timestamp(group['end'])}\n")
-                            f.write(f"{group['text']}\n\n")
-                            subtitle_index += 1
-                    else:
-                        # Fallback to segment-level timing (old method)
-                        def split_text(text: str, max_chars: int) -> List[str]:
-                            """Split text into lines respecting word boundaries"""
-                            words = text.split()
-                            lines = []
-                            current_line = []
-                            current_length = 0
-                            
-                            for word in words:
-                                word_length = len(word) + (1 if current_line else 0)
-                                
-                                if current_length + word_length <= max_chars:
-                                    current_line.append(word)
-                                    current_length += word_length
-                                else:
-                                    if current_line:
-                                        lines.append(' '.join(current_line))
-                                    current_line = [word]
-                                    current_length = len(word)
-                            
-                            if current_line:
-                                lines.append(' '.join(current_line))
+                        for word in words:
+                            word_length = len(word) + (1 if current_line else 0)
                             
-                            return lines
+                            if current_length + word_length <= max_chars:
+                                current_line.append(word)
+                                current_length += word_length
+                            else:
+                                if current_line:
+                                    lines.append(' '.join(current_line))
+                                current_line = [word]
+                                current_length = len(word)
                         
-                        text_lines = split_text(segment['text'], max_chars_per_line)
+                        if current_line:
+                            lines.append(' '.join(current_line))
                         
-                        if len(text_lines) == 1:
-                            f.write(f"{subtitle_index}\n")
-                            f.write(f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n")
-                            f.write(f"{text_lines[0]}\n\n")
-                            subtitle_index += 1
-                        else:
-                            duration = segment['end'] - segment['start']
-                            time_per_line = duration / len(text_lines)
-                            
-                            for i, line in enumerate(text_lines):
-                                start_time = segment['start'] + (i * time_per_line)
-                                end_time = segment['start'] + ((i + 1) * time_per_line)
-                                
-                                f.write(f"{subtitle_index}\n")
-                                f.write(f"{format_timestamp(start_time)} --> {format_timestamp(end_time)}\n")
-                                f.write(f"{line}\n\n")
-                                subtitle_index += 1
+                        return lines
+                    
+                    text_lines = split_text(segment['text'], max_chars_per_line)
+                    
+                    if len(text_lines) == 1:
+                        cues.append((segment['start'], segment['end'], text_lines[0]))
+                    else:
+                        duration = segment['end'] - segment['start']
+                        time_per_line = duration / len(text_lines)
+                        
+                        for i, line in enumerate(text_lines):
+                            start_time = segment['start'] + (i * time_per_line)
+                            end_time = segment['start'] + ((i + 1) * time_per_line)
+                            cues.append((start_time, end_time, line))
+            
+            if pysubs2 is not None:
+                # The format follows the extension, so .ass or .vtt paths work as well as .srt
+                subs = pysubs2.SSAFile()
+                subs.events = [pysubs2.SSAEvent(start=int(round(start * 1000)), end=int(round(end * 1000)), text=text)
+                               for start, end, text in cues]
+                subs.save(srt_path, encoding='utf-8',
+                          format_=None if Path(srt_path).suffix.lower() in ('.ass', '.ssa', '.vtt') else 'srt')
+            else:
+                srt_text = ''.join(
+                    f"{index}\n{_format_srt_timestamp(start)} --> {_format_srt_timestamp(end)}\n{text}\n\n"
+                    for index, (start, end, text) in enumerate(cues, 1))
+                with open(srt_path, 'w', encoding='utf-8') as f:
+                    f.write(srt_text)
             
             print_success(f"SRT file generated: {srt_path}")
             return srt_path
@@ -307,51 +605,140 @@ class SubtitleGenerator:
         Returns:
             str: Path to output video with burned subtitles
         """
+        cmd, cue_dir = self._burn_subtitles_cmd(video_path, srt_path, output_path, font_size, font_color,
+                                                outline_color, outline_width, font_file)
+        
+        try:
+            # Only errors are logged, so stderr stays raw bytes unless the command fails
+            subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE, check=True)
+            print_success(f"Subtitles burned successfully: {output_path}")
+            return output_path
+        except subprocess.CalledProcessError as e:
+            print_error(f"Subtitle burning failed: {e.stderr.decode('utf-8', errors='replace')}")
+            raise
+        finally:
+            if cue_dir:
+                shutil.rmtree(cue_dir, ignore_errors=True)
+    
+    async def burn_subtitles_async(self, video_path: str, srt_path: str, output_path: str,
+                                   font_size: int = 24, font_color: str = "white",
+                                   outline_color: str = "black", outline_width: int = 2,
+                                   font_file: str = None) -> str:
+        """burn_subtitles without blocking the event loop"""
+        cmd, cue_dir = self._burn_subtitles_cmd(video_path, srt_path, output_path, font_size, font_color,
+                                                outline_color, outline_width, font_file)
+        try:
+            await self._run_ffmpeg_async(cmd, "Subtitle burning failed")
+        finally:
+            if cue_dir:
+                shutil.rmtree(cue_dir, ignore_errors=True)
+        print_success(f"Subtitles burned successfully: {output_path}")
+        return output_path
+    
+    def _burn_subtitles_cmd(self, video_path: str, srt_path: str, output_path: str,
+                            font_size: int, font_color: str, outline_color: str,
+                            outline_width: int, font_file: str = None) -> Tuple[List[str], Optional[str]]:
+        """FFmpeg command for burn_subtitles, and the temp directory of pre-rendered cues to delete after it"""
         print_header(f"Burning subtitles into video: {Path(output_path).name}")
         
-        # Escape file paths for ffmpeg
-        srt_path_escaped = srt_path.replace('\\', '\\\\').replace(':', '\\:')
+        if self.config.get('subtitles', {}).get('PRERENDER_SUBTITLES', False):
+            prerendered = self._prerendered_subtitles_cmd(video_path, srt_path, output_path, font_size,
+                                                          font_color, outline_color, outline_width, font_file)
+            if prerendered:
+                return prerendered
         
-        # Build subtitle filter with optional font file
-        if font_file and os.path.exists(font_file):
-            font_file_escaped = font_file.replace('\\', '\\\\').replace(':', '\\:')
-            subtitle_filter = f'subtitles={srt_path_escaped}:force_style=\'FontName={Path(font_file).stem},FontFile={font_file_escaped},FontSize={font_size},PrimaryColour=&H{self._color_to_bgr(font_color)},OutlineColour=&H{self._color_to_bgr(outline_color)},Outline={outline_width},Alignment=2\''
-        else:
-            subtitle_filter = f'subtitles={srt_path_escaped}:force_style=\'FontSize={font_size},PrimaryColour=&H{self._color_to_bgr(font_color)},OutlineColour=&H{self._color_to_bgr(outline_color)},Outline={outline_width},Alignment=2\''
+        # Subtitle filter with optional font file; the style string is cached per style
+        force_style = _subtitle_force_style(font_size, font_color, outline_color, outline_width, font_file)
+        subtitle_filter = f"subtitles='{_escape_filter_path(srt_path)}':force_style='{force_style}'"
         
         cmd = [
-            'ffmpeg',
+            'ffmpeg', '-nostdin', '-hide_banner', '-nostats', '-loglevel', 'error',
             '-i', video_path,
             '-vf', subtitle_filter,
             '-c:a', 'copy',  # Copy audio without re-encoding
             '-y',
             output_path
         ]
+        return cmd, None
+    
+    def _prerendered_subtitles_cmd(self, video_path: str, srt_path: str, output_path: str,
+                                   font_size: int, font_color: str, outline_color: str,
+                                   outline_width: int, font_file: str = None) -> Optional[Tuple[List[str], str]]:
+        """
+        Burn command that overlays each cue as an image rendered once with Pillow, instead of
+        libass shaping the text again on every frame
         
+        Returns None (use the subtitles filter) without Pillow or the font file, for more than
+        MAX_PRERENDERED_CUES cues, or if the video height can't be read.
+        """
+        font_file = font_file or self.config.get('subtitles', {}).get('FONT_FILE')
+        if Image is None or not (font_file and os.path.exists(font_file)):
+            return None
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            print_success(f"Subtitles burned successfully: {output_path}")
-            return output_path
-        except subprocess.CalledProcessError as e:
-            print_error(f"Subtitle burning failed: {e.stderr}")
-            raise
+            cues = _read_srt_cues(srt_path)
+            if not cues or len(cues) > MAX_PRERENDERED_CUES:
+                return None
+            
+            result = subprocess.run(['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                                     '-show_entries', 'stream=height', '-of', 'csv=p=0', video_path],
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=30)
+            video_height = int(result.stdout.strip() or 0)
+            if result.returncode != 0 or video_height <= 0:
+                return None
+        except (OSError, ValueError, subprocess.SubprocessError):
+            return None
+        
+        # Match the libass output: sizes are in script pixels, bottom centre, 10px margin
+        scale = video_height / _LIBASS_PLAY_RES_Y
+        font = ImageFont.truetype(font_file, max(1, round(font_size * scale)))
+        stroke = round(outline_width * scale)
+        margin = round(10 * scale)
+        
+        cue_dir = tempfile.mkdtemp(prefix="subtitle_cues_")
+        inputs = []
+        filters = []
+        current = "[0:v]"
+        for i, (start, end, text) in enumerate(cues, 1):
+            left, top, right, bottom = ImageDraw.Draw(Image.new('RGBA', (1, 1))).multiline_textbbox(
+                (0, 0), text, font=font, stroke_width=stroke, align='center')
+            # Newer Pillow returns fractional boxes for TrueType fonts
+            size = (max(1, math.ceil(right - left)), max(1, math.ceil(bottom - top)))
+            image = Image.new('RGBA', size, (0, 0, 0, 0))
+            ImageDraw.Draw(image).multiline_text((-left, -top), text, font=font, fill=font_color,
+                                                 stroke_width=stroke, stroke_fill=outline_color, align='center')
+            cue_path = os.path.join(cue_dir, f"cue_{i}.png")
+            image.save(cue_path)
+            
+            inputs += ['-i', cue_path]
+            label = "[v]" if i == len(cues) else f"[s{i}]"
+            filters.append(f"{current}[{i}:v]overlay=x=(W-w)/2:y=H-h-{margin}"
+                           f":enable='between(t,{start:.3f},{end:.3f})'{label}")
+            current = label
+        
+        cmd = [
+            'ffmpeg', '-nostdin', '-hide_banner', '-nostats', '-loglevel', 'error',
+            '-i', video_path,
+            *inputs,
+            '-filter_complex', ';'.join(filters),
+            '-map', '[v]', '-map', '0:a?',
+            '-c:a', 'copy',  # Copy audio without re-encoding
+            '-y',
+            output_path
+        ]
+        return cmd, cue_dir
     
     def _color_to_bgr(self, color: str) -> str:
         """Convert color name to BGR hex for ffmpeg"""
-        color_map = {
-            'white': 'FFFFFF',
-            'black': '000000',
-            'red': '0000FF',
-            'green': '00FF00',
-            'blue': 'FF0000',
-            'yellow': '00FFFF',
-            'cyan': 'FFFF00',
-            'magenta': 'FF00FF'
-        }
-        return color_map.get(color.lower(), 'FFFFFF')
+        return _COLOR_BGR.get(color.lower(), 'FFFFFF')
     
     def process_video_subtitles(self, video_path: str, output_dir: str = None, 
                               language: str = None, burn_subs: bool = False) -> Dict[str, str]:
+        """Blocking wrapper around process_video_subtitles_async, for callers without an event loop"""
+        return asyncio.run(self.process_video_subtitles_async(video_path, output_dir, language, burn_subs))
+    
+    async def process_video_subtitles_async(self, video_path: str, output_dir: str = None,
+                                            language: str = None, burn_subs: bool = False) -> Dict[str, str]:
         """
         Complete subtitle processing pipeline for a video
         
@@ -370,29 +757,33 @@ class SubtitleGenerator:
         video_name = Path(video_path).stem
         
         # File paths
-        audio_path = os.path.join(tempfile.gettempdir(), f"{video_name}_temp_audio.wav")
         srt_path = os.path.join(output_dir, f"{video_name}_subtitles.srt")
         
         results = {
             'video_path': video_path,
-            'srt_path': srt_path,
-            'audio_path': audio_path
+            'srt_path': srt_path
         }
         
         try:
-            # Extract audio
-            self.extract_audio(video_path, audio_path)
-            
-            # Transcribe
-            transcription = self.transcribe_audio(audio_path, language)
-            
-            # Generate SRT
-            self.generate_srt(transcription, srt_path)
+            if self._srt_is_current(srt_path, video_path):
+                # Subtitles from an earlier run of the same video: burning is then the only
+                # FFmpeg pass, with no audio extraction or transcription
+                print_success(f"Reusing existing subtitles: {srt_path}")
+            else:
+                # Extract audio straight into memory
+                audio = await self._stream_audio_to_numpy(video_path)
+                
+                # Transcribe (CPU bound, so off the event loop thread)
+                transcription = await asyncio.get_running_loop().run_in_executor(
+                    None, self.transcribe_audio, audio, language)
+                
+                # Generate SRT
+                self.generate_srt(transcription, srt_path)
             
             # Optionally burn subtitles
             if burn_subs:
                 subtitled_video_path = os.path.join(output_dir, f"{video_name}_with_subtitles.mp4")
-                self.burn_subtitles(video_path, srt_path, subtitled_video_path)
+                await self.burn_subtitles_async(video_path, srt_path, subtitled_video_path)
                 results['subtitled_video_path'] = subtitled_video_path
             
             return results
@@ -400,16 +791,19 @@ class SubtitleGenerator:
         except Exception as e:
             print_error(f"Subtitle processing failed: {e}")
             raise
-        finally:
-            # Cleanup temporary audio file
-            if os.path.exists(audio_path):
-                try:
-                    os.remove(audio_path)
-                except OSError:
-                    pass
+    
+    @staticmethod
+    def _srt_is_current(srt_path: str, video_path: str) -> bool:
+        """True if srt_path exists, isn't empty and was written after the video"""
+        try:
+            srt_stat = os.stat(srt_path)
+            return srt_stat.st_size > 0 and srt_stat.st_mtime >= os.stat(video_path).st_mtime
+        except OSError:
+            return False
     
     def cleanup(self):
         """Cleanup resources"""
         if self.model is not None:
-            # faster-whisper doesn't need explicit cleanup
+            # Only drops this instance's reference; the model stays in _MODEL_CACHE
+            # for other generators until clear_cache()
             self.model = None
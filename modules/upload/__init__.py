@@ -1 +1,19 @@
 """Upload functionality modules for TTVClips"""
+from concurrent.futures import ThreadPoolExecutor
+
+# Browser-driven uploads hold a thread for minutes at a time, so they get their own bounded
+# pool instead of occupying the event loop's default executor (used e.g. for transcription).
+# upload_batch sizes it from the per-platform limits, so those alone decide how many run at once
+_UPLOAD_POOL = None
+_UPLOAD_POOL_WORKERS = 0
+
+def _upload_pool(workers: int = 5) -> ThreadPoolExecutor:
+    """Return the shared upload ThreadPoolExecutor, recreating it if it has fewer than `workers` threads"""
+    global _UPLOAD_POOL, _UPLOAD_POOL_WORKERS
+    if _UPLOAD_POOL is None or _UPLOAD_POOL_WORKERS < workers:
+        if _UPLOAD_POOL is not None:
+            # Uploads still running on the old pool finish there
+            _UPLOAD_POOL.shutdown(wait=False)
+        _UPLOAD_POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload")
+        _UPLOAD_POOL_WORKERS = workers
+    return _UPLOAD_POOL
@@ -0,0 +1,91 @@
+import os
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from modules.upload import _upload_pool
+from modules.upload.yt_upload import yt_upload
+from modules.upload.tiktok_upload import tiktok_upload
+from modules.utils.logger import print_error
+
+
+async def upload_batch(
+    clips: List[Dict[str, Any]],
+    subfolder: str,
+    schedules: Optional[List[Optional[datetime]]] = None,
+    youtube: bool = True,
+    tiktok: bool = True,
+    max_concurrent: int = 4,
+    tiktok_concurrent: int = 1,
+    video_paths: Optional[List[Optional[Path]]] = None
+) -> Dict[str, List[bool]]:
+    """
+    Upload several clips to YouTube and TikTok at the same time
+
+    Args:
+        clips: Clip dicts with 'title', 'broadcaster_name' and 'id'
+        subfolder: Directory containing the rendered videos
+        schedules: Optional scheduled YouTube upload time for each clip
+        youtube: Upload to YouTube
+        tiktok: Upload to TikTok
+        max_concurrent: YouTube uploads running at once, to stay within rate limits
+        tiktok_concurrent: TikTok uploads running at once. Each one drives a browser on the
+            same tt_cookies.txt, so they run one at a time unless raised
+        video_paths: Rendered video for each clip, if the caller already has them
+            (otherwise they are looked up in subfolder)
+
+    Returns:
+        Dict[str, List[bool]]: Per-clip success for 'youtube' and 'tiktok' (empty if disabled)
+    """
+    # Uploads are network bound and independent, so they only wait on their platform's semaphore;
+    # the upload pool gets a thread for every upload the two semaphores let through
+    youtube_limit = asyncio.Semaphore(max(1, max_concurrent))
+    tiktok_limit = asyncio.Semaphore(max(1, tiktok_concurrent))
+    _upload_pool(max(1, max_concurrent) + max(1, tiktok_concurrent))
+    schedules = schedules or [None] * len(clips)
+
+    async def limited(semaphore, coro):
+        async with semaphore:
+            return await coro
+
+    if video_paths is None:
+        # One directory listing finds every rendered video instead of a stat per clip and platform;
+        # clips missing here (or a missing subfolder) get None and report the missing file from
+        # the uploader itself, so the rest of the batch still uploads
+        try:
+            with os.scandir(subfolder) as entries:
+                rendered = {entry.name: Path(entry.path) for entry in entries if entry.is_file()}
+        except OSError:
+            rendered = {}
+        video_paths = [rendered.get(f"{clip['broadcaster_name']}_{clip['id']}_rendered.mp4") for clip in clips]
+
+    tasks = []
+    if youtube:
+        tasks += [limited(youtube_limit, yt_upload(
+            file_name=clip['title'],
+            broadcaster_name=clip['broadcaster_name'],
+            id=clip['id'],
+            subfolder=subfolder,
+            schedule=schedule,
+            video_path=video_path
+        )) for clip, schedule, video_path in zip(clips, schedules, video_paths)]
+    if tiktok:
+        tasks += [limited(tiktok_limit, tiktok_upload(
+            file_name=clip['title'],
+            broadcaster_name=clip['broadcaster_name'],
+            clip_id=clip['id'],
+            subfolder=subfolder,
+            video_path=video_path
+        )) for clip, video_path in zip(clips, video_paths)]
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # One failed upload doesn't cancel the others; report it and count it as failed
+    successes = []
+    for result in results:
+        if isinstance(result, Exception):
+            print_error(f"Upload error: {result}")
+        successes.append(result is True)
+
+    youtube_count = len(clips) if youtube else 0
+    return {'youtube': successes[:youtube_count], 'tiktok': successes[youtube_count:]}
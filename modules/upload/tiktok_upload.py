@@ -2,16 +2,23 @@ import os
 import asyncio
 from typing import Optional
 from datetime import datetime
+from pathlib import Path
 from tiktok_uploader.upload import upload_video
 from modules.utils.logger import print_header, print_error, print_success
+from modules.upload import _upload_pool
 
+# Cookies file used by the uploader (pure path computation, done once at import)
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_CONFIG_DIR = _PROJECT_ROOT / 'config'
+_COOKIES_PATH = str(_CONFIG_DIR / 'tt_cookies.txt')
 
 async def tiktok_upload(
     file_name: str,
     broadcaster_name: str,
     clip_id: str,
     subfolder: str,
-    schedule: Optional[datetime] = None
+    schedule: Optional[datetime] = None,
+    video_path: Optional[Path] = None
 ) -> bool:
     """
     Upload a video to TikTok
@@ -22,28 +29,29 @@ async def tiktok_upload(
         creator_id: Unique identifier for the clip
         subfolder: Directory containing the video
         schedule: Optional datetime for scheduled upload (not currently supported by TikTok API)
+        video_path: Rendered video already found by the caller (skips the lookup in subfolder)
 
     Returns:
         bool: True if upload was successful, False otherwise
     """
     try:
-        video_path = os.path.join(os.getcwd(), subfolder, f"{broadcaster_name}_{clip_id}_rendered.mp4")
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"Video file not found: {video_path}")
+        if video_path is None:
+            video_path = os.path.join(os.getcwd(), subfolder, f"{broadcaster_name}_{clip_id}_rendered.mp4")
+            if not os.path.exists(video_path):
+                raise FileNotFoundError(f"Video file not found: {video_path}")
 
         description = f"{file_name} #Twitch #TwitchClips #TwitchFails #TwitchMoments #TwitchStreamer #Streamer #fyp"
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        config_dir = os.path.join(project_root, 'config')
-        os.makedirs(config_dir, exist_ok=True)
-        cookies_path = os.path.join(config_dir, 'tt_cookies.txt')
-
-        # TikTok upload is synchronous, run in executor to avoid blocking
-        await asyncio.get_event_loop().run_in_executor(
-            None,
+        description = description[:2200]  # TikTok description limit
+        os.makedirs(_CONFIG_DIR, exist_ok=True)
+
+        # TikTok upload is synchronous, run in executor to avoid blocking;
+        # the executor thread only runs the upload itself
+        await asyncio.get_running_loop().run_in_executor(
+            _upload_pool(),
             lambda: upload_video(
-                filename=video_path,
-                description=description[:2200],  # TikTok description limit
-                cookies=cookies_path,
+                filename=str(video_path),
+                description=description,
+                cookies=_COOKIES_PATH,
                 headless=False,
                 browser='firefox'
             )
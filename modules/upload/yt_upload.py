@@ -2,9 +2,31 @@ import os
 import asyncio
 import browser_cookie3
 from datetime import datetime, timedelta
+from pathlib import Path
 from modules.utils.logger import print_header, print_error, print_success
+from modules.upload import _upload_pool
 from youtube_up import AllowCommentsEnum, Metadata, PrivacyEnum, YTUploaderSession
 
+_YT_COOKIES_PATH = 'config/yt_cookies.txt'
+
+# Parsed cookie session, reused until the cookies file changes on disk
+_YT_SESSION: YTUploaderSession = None
+_YT_COOKIE_MTIME: float = 0.0
+
+def _get_session() -> YTUploaderSession:
+    """Return the cached upload session, re-reading the cookies file only if it was modified."""
+    global _YT_SESSION, _YT_COOKIE_MTIME
+    mtime = os.stat(_YT_COOKIES_PATH).st_mtime
+    if _YT_SESSION is None or mtime != _YT_COOKIE_MTIME:
+        _YT_SESSION = YTUploaderSession.from_cookies_txt(_YT_COOKIES_PATH)
+        _YT_COOKIE_MTIME = mtime
+    return _YT_SESSION
+
+def _invalidate_session():
+    """Drop the cached upload session so the next _get_session() reloads the cookies file"""
+    global _YT_SESSION
+    _YT_SESSION = None
+
 async def yt_check_cookies() -> bool:
     """Check if YouTube cookies are valid."""
     try:
@@ -20,7 +42,7 @@ async def get_youtube_cookies():
         cookies = browser_cookie3.firefox(domain_name='.youtube.com')
         
         os.makedirs("config", exist_ok=True)
-        cookie_path = "config/yt_cookies.txt"
+        cookie_path = _YT_COOKIES_PATH
         
         with open(cookie_path, "w") as file:
             file.write("# Netscape HTTP Cookie File\n")
@@ -43,7 +65,8 @@ async def get_youtube_cookies():
         print_error(f"Error getting YouTube cookies: {e}")
         return False
 
-async def yt_upload(file_name: str, broadcaster_name: str, id: str, subfolder: str, schedule: datetime = None) -> bool:
+async def yt_upload(file_name: str, broadcaster_name: str, id: str, subfolder: str, schedule: datetime = None,
+                    video_path: Path = None) -> bool:
     """
     Upload a video to YouTube.
     
@@ -53,6 +76,7 @@ async def yt_upload(file_name: str, broadcaster_name: str, id: str, subfolder: s
         id: Unique identifier for the clip
         subfolder: Directory containing the video
         schedule: Optional datetime for scheduled upload
+        video_path: Rendered video already found by the caller (skips the lookup in subfolder)
     
     Returns:
         bool: True if upload was successful, False otherwise
@@ -63,11 +87,12 @@ async def yt_upload(file_name: str, broadcaster_name: str, id: str, subfolder: s
 
         print_header(f"Uploading {file_name} to YouTube...")
         
-        video_path = os.path.join(os.getcwd(), subfolder, f"{broadcaster_name}_{id}_rendered.mp4")
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"Video file not found: {video_path}")
+        if video_path is None:
+            video_path = os.path.join(os.getcwd(), subfolder, f"{broadcaster_name}_{id}_rendered.mp4")
+            if not os.path.exists(video_path):
+                raise FileNotFoundError(f"Video file not found: {video_path}")
 
-        uploader = YTUploaderSession.from_cookies_txt('config/yt_cookies.txt')
+        uploader = _get_session()
         metadata = Metadata(
             title=file_name[:100],  # YouTube title limit is 100 characters
             description=description,
@@ -79,9 +104,9 @@ async def yt_upload(file_name: str, broadcaster_name: str, id: str, subfolder: s
         )
 
         # Upload is synchronous, run in executor to avoid blocking
-        await asyncio.get_event_loop().run_in_executor(
-            None, 
-            lambda: uploader.upload(video_path, metadata)
+        await asyncio.get_running_loop().run_in_executor(
+            _upload_pool(), 
+            lambda: uploader.upload(str(video_path), metadata)
         )
         
         print_success(f"Successfully uploaded {file_name} to YouTube")
@@ -91,7 +116,8 @@ async def yt_upload(file_name: str, broadcaster_name: str, id: str, subfolder: s
         print_error(f"YouTube upload error: {e}")
         if "cookie" in str(e).lower():
             print_header("Attempting to refresh cookies...")
+            _invalidate_session()  # Rejected cookies; the retry loads the refreshed file
             if await get_youtube_cookies():
                 print_header("Retrying upload with new cookies...")
-                return await yt_upload(file_name, broadcaster_name, id, subfolder, schedule)
+                return await yt_upload(file_name, broadcaster_name, id, subfolder, schedule, video_path)
         return False
@@ -1,4 +1,9 @@
+import atexit
 import logging
+import os
+import queue
+import sys
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 
 # Set up the logger
 logger = logging.getLogger("TTVClips")
@@ -8,27 +13,81 @@ logger.setLevel(logging.DEBUG)
 file_handler = logging.FileHandler('config/app.log', encoding='utf-8')
 file_handler.setLevel(logging.DEBUG)
 
+# Unicode characters that might cause issues in the log file, and their replacements
+_LOG_TRANSLATION = str.maketrans({'✓': '[SUCCESS]', '✗': '[FAILED]'})
+
+def _clean_log_text(text):
+    # Most messages have neither character, so skip the translate for them
+    if '✓' in text or '✗' in text:
+        return text.translate(_LOG_TRANSLATION)
+    return text
+
+class _FileFormatter(logging.Formatter):
+    """Log file lines, with the Unicode characters replaced"""
+    def format(self, record):
+        return _clean_log_text(super().format(record))
+
+class _ConsoleFormatter(logging.Formatter):
+    """The coloured [TTVClips][TAG] lines shown on the terminal"""
+    COLORS = {'INFO': '34', 'SUCCESS': '32', 'ERROR': '31'}
+
+    def format(self, record):
+        tag = getattr(record, 'tag', record.levelname)
+        return f"\u001b[{self.COLORS.get(tag, '0')}m[TTVClips][{tag}]\u001b[0m {record.getMessage()}"
+
+class _BatchConsoleHandler(MemoryHandler):
+    """Buffers console lines and writes them in one go, for when stdout is piped to a file"""
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                stream = self.target.stream
+                stream.write(''.join(self.target.format(record) + '\n' for record in self.buffer))
+                stream.flush()
+                self.buffer.clear()
+
+# Number of lines held back before a batch run writes them to stdout
+CONSOLE_BUFFER_SIZE = 100
+
 # Create a formatter and attach it to the file handler
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
+file_handler.setFormatter(_FileFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+# On a terminal every line is shown right away; when piped, errors or a full buffer flush it
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(_ConsoleFormatter())
+if sys.stdout is not None and sys.stdout.isatty():
+    console_handler = _stdout_handler
+else:
+    console_handler = _BatchConsoleHandler(CONSOLE_BUFFER_SIZE, flushLevel=logging.ERROR, target=_stdout_handler)
+logger.addHandler(console_handler)
+
+# Log calls only put the record on a queue; a listener thread does the file writes
+log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(log_queue))
+listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
 
-# Add the file handler to the logger
-logger.addHandler(file_handler)
+def _restart_listener():
+    """Forked render workers inherit the queue but not the listener thread, so start their own"""
+    global listener
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+if hasattr(os, 'register_at_fork'):
+    # Flush before forking so a worker doesn't write the parent's buffered lines again
+    os.register_at_fork(before=console_handler.flush, after_in_child=_restart_listener)
+
+def flush_console():
+    """Write out buffered console lines, e.g. before sleeping between daemon runs"""
+    console_handler.flush()
 
 # Define custom print functions
 def print_header(header_text):
-    # Clean text for logging (remove Unicode characters that might cause issues)
-    clean_text = header_text.replace('✓', '[SUCCESS]').replace('✗', '[FAILED]')
-    logger.info(clean_text)
-    print(f"\u001b[34m[TTVClips][INFO]\u001b[0m {header_text}")
+    logger.info(header_text, extra={'tag': 'INFO'})
 
 def print_error(error_text):
-    clean_text = error_text.replace('✓', '[SUCCESS]').replace('✗', '[FAILED]')
-    logger.error(clean_text)
-    print(f"\u001b[31m[TTVClips][ERROR]\u001b[0m {error_text}")
+    logger.error(error_text, extra={'tag': 'ERROR'})
 
 def print_success(success_text):
-    clean_text = success_text.replace('✓', '[SUCCESS]').replace('✗', '[FAILED]')
-    logger.info(clean_text)
-    print(f"\u001b[32m[TTVClips][SUCCESS]\u001b[0m {success_text}")
-
+    logger.info(success_text, extra={'tag': 'SUCCESS'})
@@ -4,18 +4,27 @@ Author: github.com/r-yeates
 """
 import os
 import sys
+import argparse
+import subprocess
 import datetime
 import asyncio
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, AsyncIterable, Iterable, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 from modules.auth.access_token import TwitchAuthenticator
 from modules.data.get_clips import ClipFetcher
 from modules.data.download_clips import ClipDownloader
-from modules.upload.yt_upload import yt_upload, get_youtube_cookies
-from modules.upload.tiktok_upload import tiktok_upload
-from modules.utils.logger import print_header, print_error, print_success
+from modules.upload.yt_upload import get_youtube_cookies
+from modules.upload.batch_upload import upload_batch
+from modules.utils.logger import print_header, print_error, print_success, flush_console
 from modules.config.config_validator import ConfigValidator
 from modules.processing.subtitle_generator import SubtitleGenerator
 from modules.processing.ffmpeg_processor import FFmpegProcessor
@@ -33,12 +42,27 @@ class TTVClips:
         if not validator.validate():
             raise RuntimeError("Configuration validation failed")
             
-        self.config = self._load_config()
+        # The validator already parsed config.json; only read it again if it didn't
+        self.config = validator.config or self._load_config()
         self.secrets = self._load_secrets()
         self._setup_constants()
         self.authenticator = TwitchAuthenticator(self.CLIENT_ID, self.CLIENT_SECRET)
         self.ffmpeg_processor = FFmpegProcessor(self.config)
+        # Created on the first clip that needs subtitles and kept for later runs in daemon mode
+        self.subtitle_generator = None
+        # Set by initialize(); in daemon mode the authenticated client is kept between runs
+        self.clip_fetcher = None
+        self.clip_downloader = None
         
+    @staticmethod
+    def _read_json(path: str) -> Dict[str, Any]:
+        """Parse a JSON file, with orjson when it's installed"""
+        if orjson is not None:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from config.json"""
         config_path = self.config_path
@@ -46,18 +70,14 @@ class TTVClips:
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Config file not found: {config_path}") 
             
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        return config
+        return self._read_json(config_path)
     
     def _load_secrets(self) -> Dict[str, str]:
         """Load secrets from secrets.json"""
         if not os.path.exists(self.secrets_path):
             raise FileNotFoundError(f"Secrets file not found: {self.secrets_path}. Please create it with your CLIENT_ID and CLIENT_SECRET.") 
             
-        with open(self.secrets_path, 'r', encoding='utf-8') as f:
-            secrets = json.load(f)
+        secrets = self._read_json(self.secrets_path)
         
         # Validate required secrets
         required_secrets = ['CLIENT_ID', 'CLIENT_SECRET']
@@ -95,6 +115,8 @@ class TTVClips:
             subtitles_config = self.config.get('subtitles', {})
             self.ENABLE_SUBTITLES = subtitles_config.get('ENABLE_SUBTITLES', False)
             self.WHISPER_MODEL_SIZE = subtitles_config.get('WHISPER_MODEL_SIZE', 'base')
+            self.WHISPER_DEVICE = subtitles_config.get('DEVICE', 'auto')
+            self.WHISPER_COMPUTE_TYPE = subtitles_config.get('COMPUTE_TYPE', 'auto')
             self.SUBTITLE_LANGUAGE = subtitles_config.get('SUBTITLE_LANGUAGE', 'en')
             self.BURN_SUBTITLES = subtitles_config.get('BURN_SUBTITLES', False)
             self.SUBTITLE_FONT_SIZE = subtitles_config.get('SUBTITLE_FONT_SIZE', 20)
@@ -116,6 +138,10 @@ class TTVClips:
 
     async def initialize(self):
         """Initialize Twitch API components"""
+        if self.clip_fetcher is not None:
+            # Still authenticated from the previous run; twitchAPI refreshes an expired app token itself
+            return
+        
         token, twitch = await self.authenticator.authenticate()
         if not token or not twitch:
             raise RuntimeError("Failed to authenticate with Twitch")
@@ -133,161 +159,296 @@ class TTVClips:
             language=self.CLIPS_LANGUAGE
         )
     
-    def process_clips(self, clips: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process clips in optimized batch workflow: Download → Render → Upload"""
+    def iter_clips(self):
+        """Clips from Twitch API as they are fetched, page by page"""
+        return self.clip_fetcher.iter_clips(
+            game_id=self.GAME_ID,
+            clips_amount=self.CLIPS_AMOUNT,
+            period=self.PERIOD,
+            blacklisted_channels=self.BLACKLISTED_CHANNELS,
+            language=self.CLIPS_LANGUAGE
+        )
+    
+    async def process_clips(self, clips: Union[Iterable, AsyncIterable]) -> List[Dict[str, Any]]:
+        """Process clips in optimized batch workflow: Download → Render → Upload
+        
+        clips is either a list or an async iterator such as iter_clips(), in which case downloads
+        start with the first clips while the rest are still being fetched
+        """
         today = datetime.date.today().strftime('%Y-%m-%d')
         subfolder = os.path.join(today)
         clips_dir = os.path.join('clips', subfolder)
         os.makedirs(clips_dir, exist_ok=True)
         
-        # Phase 1: Check what needs processing and download clips
-        print_header("Phase 1: Downloading clips...")
-        clips_to_process = []
-        already_rendered = []
-        successful_downloads = 0
-        target_clips = self.CLIPS_AMOUNT
+        # Check what needs processing, then download, subtitle and render the rest
+        print_header("Downloading and rendering clips...")
+        # One directory read instead of a stat per clip
+        with os.scandir(clips_dir) as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
+        if not hasattr(clips, '__aiter__'):
+            clips = _aiter(clips)
         
-        for clip in clips:
-            # Stop if we have enough clips
-            if successful_downloads >= target_clips:
-                break
-                
+        # Downloads, subtitles and renders overlap: each downloaded clip is handed to the subtitle
+        # worker and then to the render worker while the next clips are still downloading
+        sub_q = asyncio.Queue()
+        render_q = asyncio.Queue()
+        subtitle_task = asyncio.create_task(self._subtitle_worker(sub_q, render_q))
+        # Several renders run at once, each FFmpeg limited to its share of the cores
+        render_jobs, render_processor = self.ffmpeg_processor.split_for_parallel()
+        render_tasks = [asyncio.create_task(self._render_worker(render_q, render_processor))
+                        for _ in range(render_jobs)]
+        workers = [subtitle_task, *render_tasks]
+        try:
             try:
-                # Generate expected filename to match ClipDownloader logic
-                # ClipDownloader uses: {broadcaster_name}_{clip_id}.mp4
-                expected_filename = f"{clip['broadcaster_name']}_{clip['id']}.mp4"
-                expected_file_path = os.path.join(clips_dir, expected_filename)
-                
-                base, ext = os.path.splitext(expected_file_path)
-                rendered_path = f"{base}_rendered{ext}"
-                
-                # If already rendered, skip entirely (no download, no subtitle generation)
-                if os.path.exists(rendered_path):
-                    print_success(f"Already rendered: {clip['title'][:50]}")
-                    already_rendered.append({
-                        'clip': clip,
-                        'file_path': rendered_path
-                    })
-                    successful_downloads += 1
-                    continue
-                
-                # Only download and process if not already rendered
-                print_header(f"Downloading: {clip['title'][:50]}...")
-                file_path = self.clip_downloader.download(clip, subfolder)
-                if file_path:
-                    clips_to_process.append({
-                        'clip': clip,
-                        'raw_file_path': file_path,
-                        'expected_rendered_path': rendered_path
-                    })
-                    print_success(f"Downloaded: {os.path.basename(file_path)}")
-                    successful_downloads += 1
-                else:
-                    print_error(f"Failed to download: {clip['title'][:50]} - Trying next clip...")
-                    continue  # Skip to next clip instead of counting as failure
-                    
-            except Exception as e:
-                print_error(f"Error processing clip {clip.get('id', 'unknown')}: {str(e)} - Trying next clip...")
-                continue  # Skip to next clip instead of stopping
+                already_rendered, clips_to_process = await self._download_clips(
+                    clips, subfolder, existing, self.CLIPS_AMOUNT, sub_q)
+            finally:
+                sub_q.put_nowait(None)  # No more clips; the subtitle worker passes this on to the renderer
+            successful_downloads = len(already_rendered) + len(clips_to_process)
+            
+            print_success(f"Successfully downloaded/found {successful_downloads} clips")
+            await asyncio.gather(*workers)
+        finally:
+            # If downloading failed (or we were cancelled), stop the workers rather than leave them running
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        # Ranking order, independent of which render finished first
+        successfully_rendered = [{
+            'clip': clip_data['clip'],
+            'file_path': clip_data['rendered_path']
+        } for clip_data in clips_to_process if clip_data.get('rendered_path')]
+        
+        # Combine already rendered + newly rendered clips
+        all_processed = already_rendered + successfully_rendered
         
-        print_success(f"Successfully downloaded/found {successful_downloads} clips")
+        print_success(f"Processing complete: {len(already_rendered)} already rendered, {len(successfully_rendered)} newly rendered")
+        return all_processed
+    
+    async def _download_clips(self, clips: AsyncIterable, subfolder: str, existing: set, needed: int,
+                              sub_q: asyncio.Queue) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Take clips in ranking order until `needed` are already rendered or downloaded
         
-        # Phase 2: Generate subtitles for all downloaded clips
-        if self.ENABLE_SUBTITLES and clips_to_process:
-            print_header("Phase 2: Generating subtitles...")
-            self._generate_subtitles_batch(clips_to_process)
+        Clips whose rendered file is in `existing` and matches the current render settings
+        are not downloaded again. The rest download concurrently, each put on sub_q as soon
+        as its download finishes.
         
-        # Phase 3: Render all clips
-        print_header("Phase 3: Rendering clips...")
-        successfully_rendered = []
+        Returns:
+            (already rendered clips, downloaded clips in ranking order)
+        """
+        max_concurrent = self.config.get('download', {}).get('MAX_CONCURRENT', 4)
+        clips_dir = os.path.join('clips', subfolder)
+        candidates = clips.__aiter__()
+        render_options = self._render_options()
+        exhausted = False
+        next_index = 0
+        pending = {}
+        already_rendered = []
+        downloaded = []
         
-        for clip_data in clips_to_process:
-            try:
-                clip = clip_data['clip']
-                file_path = clip_data['raw_file_path']
-                subtitle_data = clip_data.get('subtitle_data')
+        # At most max_concurrent downloads run at once, and never more than are still needed,
+        # so a failed download starts the next clip in line instead of overshooting the target
+        try:
+            while len(already_rendered) + len(downloaded) < needed:
+                while (not exhausted and len(pending) < max_concurrent
+                       and len(already_rendered) + len(downloaded) + len(pending) < needed):
+                    try:
+                        clip = await candidates.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    
+                    # Same naming as ClipDownloader: {broadcaster_name}_{clip_id}.mp4
+                    rendered_name = f"{clip['broadcaster_name']}_{clip['id']}_rendered.mp4"
+                    rendered_path = os.path.join(clips_dir, rendered_name)
+                    # If already rendered with the current settings, skip entirely (no download,
+                    # no subtitle generation); a settings change renders the clip again
+                    if (rendered_name in existing and f"{rendered_name}.hash" in existing
+                            and self.ffmpeg_processor.is_rendered(
+                                rendered_path, self.ffmpeg_processor.render_job_hash(clip, render_options))):
+                        print_success(f"Already rendered: {clip['title'][:50]}")
+                        already_rendered.append({
+                            'clip': clip,
+                            'file_path': rendered_path
+                        })
+                        continue
+                    
+                    print_header(f"Downloading: {clip['title'][:50]}...")
+                    task = asyncio.ensure_future(self._download_clip(clip, subfolder))
+                    pending[task] = (next_index, clip, rendered_path)
+                    next_index += 1
+                if not pending:
+                    break
+            
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index, clip, rendered_path = pending.pop(task)
+                    try:
+                        file_path, audio_pcm = task.result()
+                    except Exception as e:
+                        print_error(f"Error processing clip {clip.get('id', 'unknown')}: {str(e)} - Trying next clip...")
+                        continue  # Skip to next clip instead of stopping
+                    if file_path:
+                        clip_data = {
+                            'clip': clip,
+                            'raw_file_path': file_path,
+                            'expected_rendered_path': rendered_path,
+                            'audio_pcm': audio_pcm
+                        }
+                        downloaded.append((index, clip_data))
+                        sub_q.put_nowait(clip_data)
+                        print_success(f"Downloaded: {os.path.basename(file_path)}")
+                    else:
+                        print_error(f"Failed to download: {clip['title'][:50]} - Trying next clip...")
+        finally:
+            # Stop fetching once enough clips are found
+            aclose = getattr(candidates, 'aclose', None)
+            if aclose:
+                await aclose()
+        
+        downloaded.sort(key=lambda item: item[0])
+        return already_rendered, [clip_data for _, clip_data in downloaded]
+    
+    async def _subtitle_worker(self, sub_q: asyncio.Queue, render_q: asyncio.Queue):
+        """Transcribe clips from sub_q in a worker thread and pass them on to render_q"""
+        try:
+            finished = False
+            while not finished:
+                clip_data = await sub_q.get()
+                if clip_data is None:
+                    break
+                # Clips that finished downloading meanwhile are transcribed together as one batch
+                batch = [clip_data]
+                while not sub_q.empty():
+                    clip_data = sub_q.get_nowait()
+                    if clip_data is None:
+                        finished = True
+                        break
+                    batch.append(clip_data)
                 
+                if self.ENABLE_SUBTITLES:
+                    try:
+                        # Loaded on the first clip, so nothing is loaded when every clip is already rendered
+                        if self.subtitle_generator is None:
+                            self.subtitle_generator = await asyncio.to_thread(self._create_subtitle_generator)
+                        await asyncio.to_thread(self._generate_subtitles_batch, self.subtitle_generator, batch)
+                    except Exception as e:
+                        # The batch still renders, just without subtitles
+                        print_error(f"Subtitle generation failed, rendering without subtitles: {str(e)}")
+                        for clip_data in batch:
+                            clip_data.pop('audio_pcm', None)
+                            clip_data['subtitle_data'] = None
+                for clip_data in batch:
+                    render_q.put_nowait(clip_data)
+        finally:
+            render_q.put_nowait(None)
+    
+    async def _render_worker(self, render_q: asyncio.Queue, ffmpeg_processor: FFmpegProcessor):
+        """Render clips from render_q in a worker thread, storing each output as 'rendered_path'"""
+        while (clip_data := await render_q.get()) is not None:
+            clip = clip_data['clip']
+            try:
                 print_header(f"Rendering: {clip['title'][:50]}...")
-                processed_path = self._render_clip(file_path, clip, subtitle_data)
-                
+                processed_path = await asyncio.to_thread(self._render_clip, clip_data['raw_file_path'], clip,
+                                                         clip_data.get('subtitle_data'), ffmpeg_processor)
                 if processed_path:
-                    successfully_rendered.append({
-                        'clip': clip,
-                        'file_path': processed_path
-                    })
+                    clip_data['rendered_path'] = processed_path
                 else:
                     print_error(f"Failed to render: {clip['title'][:50]}")
-                    
             except Exception as e:
                 print_error(f"Error rendering clip {clip.get('id', 'unknown')}: {str(e)}")
-                continue
+        render_q.put_nowait(None)  # Let the other render workers see the end of the queue too
+    
+    async def _download_clip(self, clip: Dict[str, Any], subfolder: str) -> tuple:
+        """Download a clip and, with subtitles enabled, extract its audio right away
         
-        # Combine already rendered + newly rendered clips
-        all_processed = already_rendered + successfully_rendered
+        The audio is read while the new file is still in the OS page cache and while
+        other clips are downloading, so the subtitle step doesn't read the file again.
         
-        print_success(f"Processing complete: {len(already_rendered)} already rendered, {len(successfully_rendered)} newly rendered")
-        return all_processed
+        Returns:
+            (file_path, audio_pcm): path None if the download failed, PCM None if not extracted
+        """
+        file_path = await self.clip_downloader.download_async(clip, subfolder)
+        if not file_path or not self.ENABLE_SUBTITLES:
+            return file_path, None
+        return file_path, await asyncio.to_thread(self._extract_audio_pcm, file_path)
+    
+    def _create_subtitle_generator(self) -> SubtitleGenerator:
+        """Subtitle generator for the configured Whisper model"""
+        compute_type = None if self.WHISPER_COMPUTE_TYPE == 'auto' else self.WHISPER_COMPUTE_TYPE
+        subtitle_generator = SubtitleGenerator(model_size=self.WHISPER_MODEL_SIZE, device=self.WHISPER_DEVICE,
+                                               compute_type=compute_type, config=self.config)
+        print_header(f"Using Whisper model: {self.WHISPER_MODEL_SIZE} on {subtitle_generator.device} "
+                     f"({subtitle_generator.compute_type}), Language: {self.SUBTITLE_LANGUAGE}")
+        return subtitle_generator
     
-    def _generate_subtitles_batch(self, clips_to_process: List[Dict[str, Any]]):
-        """Generate subtitles for all clips in batch"""
-        subtitle_generator = SubtitleGenerator(model_size=self.WHISPER_MODEL_SIZE, config=self.config)
-        print_header(f"Using Whisper model: {self.WHISPER_MODEL_SIZE}, Language: {self.SUBTITLE_LANGUAGE}")
+    def _generate_subtitles_batch(self, subtitle_generator: SubtitleGenerator, clips_to_process: List[Dict[str, Any]]):
+        """Generate subtitles for several clips, storing each as clip_data['subtitle_data']"""
+        # Audio is normally extracted at download time; any missing is extracted in parallel
+        # (independent FFmpeg processes), then everything is transcribed in a single pass
+        def clip_audio(clip_data):
+            pcm = clip_data.pop('audio_pcm', None)  # Not kept around once transcribed
+            return pcm if pcm is not None else self._extract_audio_pcm(clip_data['raw_file_path'])
         
-        for clip_data in clips_to_process:
-            try:
-                clip = clip_data['clip']
-                file_path = clip_data['raw_file_path']
-                
-                print_header(f"Generating subtitles: {clip.get('title', 'clip')[:50]}...")
-                
-                import tempfile
-                # Get audio suffix from config
-                paths_config = self.config.get('paths', {})
-                audio_suffix = paths_config.get('TEMP_AUDIO_SUFFIX', '_audio.wav')
-                temp_audio = os.path.join(tempfile.gettempdir(), f"{clip.get('id', 'temp')}{audio_suffix}")
-                
-                # Extract audio using FFmpeg
-                if self.ffmpeg_processor.extract_audio_ffmpeg(file_path, temp_audio):
-                    subtitle_data = subtitle_generator.transcribe_audio(temp_audio, self.SUBTITLE_LANGUAGE)
-                    clip_data['subtitle_data'] = subtitle_data
-                else:
-                    print_error("FFmpeg audio extraction failed, trying fallback...")
-                    subtitle_generator.extract_audio(file_path, temp_audio)
-                    subtitle_data = subtitle_generator.transcribe_audio(temp_audio, self.SUBTITLE_LANGUAGE)
-                    clip_data['subtitle_data'] = subtitle_data
-                
-                # Clean up temp audio file
-                try:
-                    if os.path.exists(temp_audio):
-                        os.remove(temp_audio)
-                except:
-                    pass
-                    
-            except Exception as e:
-                print_error(f"Subtitle generation failed for {clip.get('title', 'clip')[:50]}: {e}")
-                clip_data['subtitle_data'] = None
+        with ThreadPoolExecutor(max_workers=len(clips_to_process)) as executor:
+            audio = list(executor.map(clip_audio, clips_to_process))
+        
+        print_header(f"Generating subtitles for {len(clips_to_process)} clip(s)...")
+        transcriptions = subtitle_generator.transcribe_audio_batch(audio, self.SUBTITLE_LANGUAGE)
+        
+        for clip_data, pcm, subtitle_data in zip(clips_to_process, audio, transcriptions):
+            if pcm is None:
+                print_error(f"Audio extraction failed for {clip_data['clip'].get('title', 'clip')[:50]}, rendering without subtitles")
+            clip_data['subtitle_data'] = subtitle_data
     
-    def _render_clip(self, input_path: str, clip: Dict[str, Any], subtitle_data: List[Dict] = None) -> Optional[str]:
+    def _extract_audio_pcm(self, file_path: str) -> Optional[bytes]:
+        """A clip's audio read from an FFmpeg pipe as f32le PCM, or None if extraction failed"""
+        timeout = self.config.get('encoding', {}).get('AUDIO_EXTRACTION_TIMEOUT', 60)
+        try:
+            process = self.ffmpeg_processor.extract_audio_pipe(file_path)
+        except OSError as e:
+            print_error(f"Could not start FFmpeg for audio extraction: {str(e)}")
+            return None
+        try:
+            pcm, _ = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return None
+        
+        if process.returncode != 0 or not pcm:
+            return None
+        return pcm
+    
+    def _render_clip(self, input_path: str, clip: Dict[str, Any], subtitle_data: List[Dict] = None,
+                     ffmpeg_processor: FFmpegProcessor = None) -> Optional[str]:
         """Render a clip using FFmpeg for maximum speed"""
         try:
-            return self.ffmpeg_processor.process_clip(
+            return (ffmpeg_processor or self.ffmpeg_processor).process_clip(
                 input_path=input_path,
                 clip=clip,
                 subtitle_data=subtitle_data,
-                enable_subtitles=self.ENABLE_SUBTITLES,
-                burn_subtitles=self.BURN_SUBTITLES,
-                background_type=self.BACKGROUND_TYPE,
-                font_file=self.FONT_FILE,
-                enable_crop=self.ENABLE_CROP,
-                crop_percentage=self.CROP_PERCENTAGE,
-                crop_from_sides=self.CROP_FROM_SIDES,
-                subtitle_position_y=self.SUBTITLE_POSITION_Y,
-                subtitle_alignment=self.SUBTITLE_ALIGNMENT
+                **self._render_options()
             )
         except Exception as e:
             print_error(f"Error rendering clip with FFmpeg: {str(e)}")
             return None
     
+    def _render_options(self) -> Dict[str, Any]:
+        """The process_clip options taken from the config (also what the render job hash covers)"""
+        return {
+            'enable_subtitles': self.ENABLE_SUBTITLES,
+            'burn_subtitles': self.BURN_SUBTITLES,
+            'background_type': self.BACKGROUND_TYPE,
+            'font_file': self.FONT_FILE,
+            'enable_crop': self.ENABLE_CROP,
+            'crop_percentage': self.CROP_PERCENTAGE,
+            'crop_from_sides': self.CROP_FROM_SIDES,
+            'subtitle_position_y': self.SUBTITLE_POSITION_Y,
+            'subtitle_alignment': self.SUBTITLE_ALIGNMENT
+        }
+    
     
 
     async def upload_clips(self, processed_clips: List[Dict[str, Any]]):
@@ -304,67 +465,59 @@ class TTVClips:
         initial_delay = upload_config.get('INITIAL_DELAY_MINUTES', 30)
         interval_minutes = upload_config.get('INTERVAL_MINUTES', 30)
         
+        max_concurrent = upload_config.get('MAX_CONCURRENT', 4)
+        tiktok_concurrent = upload_config.get('TIKTOK_MAX_CONCURRENT', 1)
+        
         base_time = datetime.datetime.now() + datetime.timedelta(minutes=initial_delay)
+        clips = [processed['clip'] for processed in processed_clips]
+        # Where each clip was rendered, so a run that crosses midnight still finds them
+        video_paths = [Path(processed['file_path']) for processed in processed_clips]
+        # Each upload keeps its own slot in the schedule even though they now run at the same time
+        schedules = [base_time + datetime.timedelta(minutes=interval_minutes * i) for i in range(len(clips))]
 
-        for i, processed in enumerate(processed_clips):
-            clip = processed['clip']
-            file_path = processed['file_path']
-            
-            # Schedule each upload with configured interval
-            scheduled_time = base_time + datetime.timedelta(minutes=interval_minutes * i)
-            
-            if self.UPLOAD_TO_YOUTUBE:
-                try:
-                    print_header(f"Scheduling YouTube upload for {scheduled_time.strftime('%H:%M')}: {clip['title']}")
-                    success = await yt_upload(
-                        file_name=clip['title'],
-                        broadcaster_name=clip['broadcaster_name'],
-                        id=clip['id'],
-                        subfolder=subfolder,
-                        schedule=scheduled_time
-                    )
-                    if success:
-                        print_success(f"Successfully scheduled YouTube upload: {clip['title']}")
-                    else:
-                        print_error(f"Failed to schedule YouTube upload: {clip['title']}")
-                except Exception as e:
-                    print_error(f"Error scheduling YouTube upload: {str(e)}")
+        if self.UPLOAD_TO_YOUTUBE:
+            for clip, scheduled_time in zip(clips, schedules):
+                print_header(f"Scheduling YouTube upload for {scheduled_time.strftime('%H:%M')}: {clip['title']}")
+        if self.UPLOAD_TO_TIKTOK:
+            for clip in clips:
+                print_header(f"Uploading to TikTok: {clip['title']}")
 
-            if self.UPLOAD_TO_TIKTOK:
-                try:
-                    print_header(f"Uploading to TikTok: {clip['title']}")
-                    success = await tiktok_upload(
-                        file_name=clip['title'],
-                        broadcaster_name=clip['broadcaster_name'],
-                        clip_id=clip['id'],
-                        subfolder=subfolder
-                    )
-                    if success:
-                        print_success(f"Successfully uploaded to TikTok: {clip['title']}")
-                    else:
-                        print_error(f"Failed to upload to TikTok: {clip['title']}")
-                except Exception as e:
-                    print_error(f"Error uploading to TikTok: {str(e)}")
+        results = await upload_batch(
+            clips,
+            subfolder,
+            schedules=schedules,
+            youtube=self.UPLOAD_TO_YOUTUBE,
+            tiktok=self.UPLOAD_TO_TIKTOK,
+            max_concurrent=max_concurrent,
+            tiktok_concurrent=tiktok_concurrent,
+            video_paths=video_paths
+        )
 
-    async def run(self):
-        """Main execution flow"""
+        for clip, success in zip(clips, results['youtube']):
+            if success:
+                print_success(f"Successfully scheduled YouTube upload: {clip['title']}")
+            else:
+                print_error(f"Failed to schedule YouTube upload: {clip['title']}")
+        for clip, success in zip(clips, results['tiktok']):
+            if success:
+                print_success(f"Successfully uploaded to TikTok: {clip['title']}")
+            else:
+                print_error(f"Failed to upload to TikTok: {clip['title']}")
+
+    async def run(self, close: bool = True):
+        """Main execution flow
+        
+        Args:
+            close: Close the Twitch client afterwards (run_forever keeps it for the next run)
+        """
         try:
             # Initialize components
             await self.initialize()
             
             # Get clips
-            print_header("Fetching clips...")
-            clips = await self.get_clips()
-            
-            if not clips:
-                print_error("No clips found")
-                return
-                
-            print_success(f"Found {len(clips)} clips")
-            
-            # Process clips
-            print_header("Processing clips...")
-            processed_clips = self.process_clips(clips)
+            # Clips are processed as they are fetched, so downloads start with the first page
+            print_header("Fetching and processing clips...")
+            processed_clips = await self.process_clips(self.iter_clips())
             
             if not processed_clips:
                 print_error("No clips were processed successfully")
@@ -381,22 +534,43 @@ class TTVClips:
             raise
         finally:
             # Cleanup async resources
-            await self._cleanup()
+            if close:
+                await self._cleanup()
+    
+    async def run_forever(self, interval_seconds: float):
+        """Run every interval_seconds in this process, so the Whisper model and Twitch client are only set up once"""
+        while True:
+            try:
+                await self.run(close=False)
+            except Exception as e:
+                # run() already reported it; try again on the next cycle with a fresh client
+                print_error(f"Run failed, retrying next cycle: {str(e)}")
+                await self._cleanup()
+            
+            next_run = datetime.datetime.now() + datetime.timedelta(seconds=interval_seconds)
+            print_header(f"Next run at {next_run.strftime('%Y-%m-%d %H:%M')}")
+            flush_console()
+            await asyncio.sleep(interval_seconds)
     
     async def _cleanup(self):
         """Cleanup async resources"""
         try:
-            # Close any aiohttp sessions if they exist
-            if hasattr(self, 'clip_fetcher') and hasattr(self.clip_fetcher, 'session'):
-                if not self.clip_fetcher.session.closed:
-                    await self.clip_fetcher.session.close()
-            
-            # Give a moment for cleanup to complete
-            await asyncio.sleep(0.1)
+            # Close the Twitch client once; the next initialize() authenticates again
+            clip_fetcher, self.clip_fetcher = self.clip_fetcher, None
+            clip_downloader, self.clip_downloader = self.clip_downloader, None
+            if clip_downloader is not None:
+                await clip_downloader.close()
+            if clip_fetcher is not None:
+                await clip_fetcher.twitch.close()
         except Exception as e:
             # Don't let cleanup errors crash the app
             pass
 
+async def _aiter(items: Iterable):
+    """Async iterator over a plain list of clips"""
+    for item in items:
+        yield item
+
 def print_banner():
     """Print the application banner"""
     print("\033[1;92m" + r"""
@@ -413,8 +587,18 @@ def print_banner():
 └─────────────────────────────────────────────┘
 """ + "\033[0m")
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Download, render and upload top Twitch clips")
+    parser.add_argument('--daemon', action='store_true',
+                        help="keep running and process clips every --interval hours")
+    parser.add_argument('--interval', type=float, default=24.0,
+                        help="hours between runs in daemon mode (default: 24)")
+    return parser.parse_args(argv)
+
 async def main():
     """Main entry point"""
+    args = parse_args()
     print_banner()
     app = None
     
@@ -424,7 +608,10 @@ async def main():
         
         # Create and run TTVClips
         app = TTVClips()
-        await app.run()
+        if args.daemon:
+            await app.run_forever(args.interval * 3600)
+        else:
+            await app.run()
         
     except KeyboardInterrupt:
         print_header("\nGracefully shutting down...")
@@ -446,5 +633,6 @@ if __name__ == "__main__":
         asyncio.run(main())
     except KeyboardInterrupt:
         # Handle Ctrl+C at the top level
+        flush_console()
         print("\nProgram interrupted by user.")
         sys.exit(0)
\ No newline at end of file